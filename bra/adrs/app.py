@@ -4,28 +4,38 @@ from adrs.analyzer import Factor_3_2_3_3_Analyzer_Fixed
 import json
 import os
 from scoring.benefit_factor import get_lt_adr_data, get_serious_adr_data, get_drug_interaction_data
+from utils.file_loader import read_handoff_file
+from utils.disk_cache import cache_key
+from utils.shared_cache import SharedResultCache
+
+# The ADR review covers the whole prescription, not just `drug`, so every
+# drug and alternative of one patient shares a single analysis
+ADR_CACHE_TTL = 3600  # seconds
+_adr_cache = SharedResultCache(maxsize=256, ttl=ADR_CACHE_TTL)
+
 
 def start(drug, scoring_system=None):
-    analyzer = Factor_3_2_3_3_Analyzer_Fixed()
+    patient_data = read_handoff_file(os.path.join("..", "adrs_input"))
+    analysis = _adr_cache.get_or_compute(
+        cache_key(patient_data),
+        lambda: Factor_3_2_3_3_Analyzer_Fixed().analyze(patient_data)
+    )
+    results = dict(analysis)
     
-    with open("../adrs_input.json", 'r') as f:
-        patient_data = json.load(f)
-        results = analyzer.analyze(patient_data)
-        
-        # Calculate Scores
-        lt_score = get_lt_adr_data(results, scoring_system)
-        serious_score = get_serious_adr_data(results, scoring_system)
-        interaction_score = get_drug_interaction_data(results, scoring_system)
-        
-        # Attach scores to the results object for the worker to see
-        results['scoring'] = {
-            'lt_adr_score': lt_score,
-            'serious_adr_score': serious_score,
-            'interaction_score': interaction_score
-        }
+    # Calculate Scores
+    lt_score = get_lt_adr_data(results, scoring_system)
+    serious_score = get_serious_adr_data(results, scoring_system)
+    interaction_score = get_drug_interaction_data(results, scoring_system)
+    
+    # Attach scores to the results object for the worker to see
+    results['scoring'] = {
+        'lt_adr_score': lt_score,
+        'serious_adr_score': serious_score,
+        'interaction_score': interaction_score
+    }
 
-        output_path = os.path.join("..", "adrs_output.json")
-        with open(output_path, 'w') as f:
-            json.dump(results, f, indent=2)
-            
-        return results
\ No newline at end of file
+    output_path = os.path.join("..", "adrs_output.json")
+    with open(output_path, 'w') as f:
+        json.dump(results, f, indent=2)
+        
+    return results
\ No newline at end of file
@@ -6,6 +6,7 @@ import time
 from typing import Dict, List, Any, Optional
 from google import genai
 from google.genai import types
+from utils.file_loader import read_handoff_file
 
 # Load environment variables
 load_dotenv()
@@ -396,11 +397,10 @@ def start(scoring_system=None) -> Dict[str, Any]:
         }
     
     # Load patient input
-    patient_input_file = '../adrs_input.json'
+    patient_input_file = '../adrs_input'
     
     try:
-        with open(patient_input_file, 'r') as f:
-            patient_data = json.load(f)
+        patient_data = read_handoff_file(patient_input_file)
     except FileNotFoundError:
         print(f"\n❌ Error: {patient_input_file} not found!")
         print("Please create patient_input.json with patient diagnosis information.")
@@ -6,14 +6,15 @@ Uses centralized scoring configuration
 
 from duplication.checker import start as duplication_start
 from utils.analysis.analysis_executor import execute_parallel_analysis
-from utils.file_loader import load_input, extract_analysis_tasks
+from utils.file_loader import load_input, extract_analysis_tasks, write_json_file
 from collections import defaultdict
+import logging
 import os
 import json
 from datetime import datetime
 
 
-def main(verbose=True, input_file="input.json", output_summary=True):
+def main(verbose=True, input_file="input.json", output_summary=True, input_data=None):
     """
     Main analysis pipeline
     
@@ -21,6 +22,7 @@ def main(verbose=True, input_file="input.json", output_summary=True):
         verbose: Print detailed progress information
         input_file: Path to input JSON file
         output_summary: Generate and save summary report
+        input_data: Already-parsed input; skips reading input_file
         
     Returns:
         Boolean indicating success/failure
@@ -36,7 +38,7 @@ def main(verbose=True, input_file="input.json", output_summary=True):
     if verbose:
         print(f"[STEP 1] Loading input from: {input_file}")
     
-    data = load_input(input_file)
+    data = load_input(input_file, data=input_data)
     if not data:
         print(f"❌ Failed to load input file: {input_file}")
         return False
@@ -186,8 +188,7 @@ def main(verbose=True, input_file="input.json", output_summary=True):
         
         # Save summary
         summary_file = f"{results_dir}/analysis_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(summary_file, 'w') as f:
-            json.dump(summary, f, indent=2)
+        write_json_file(summary_file, summary)
         
         if verbose:
             print(f"✓ Summary saved to: {summary_file}")
@@ -326,6 +327,9 @@ def run_with_config(config_file="config.json"):
 if __name__ == "__main__":
     import sys
     
+    # LOG_LEVEL=DEBUG shows every analysis stage, WARNING only problems
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(message)s")
+    
     # Check for command line arguments
     if len(sys.argv) > 1:
         if sys.argv[1] == "--config":
@@ -6,6 +6,13 @@ FDA Market Experience Checker Module
 import requests
 from datetime import datetime
 from typing import Optional, Dict
+from utils.shared_cache import SharedResultCache
+
+
+# Market data depends only on the drug, so tasks for the same drug (other
+# diagnoses, alternatives) share one lookup
+MARKET_CACHE_TTL = 86400  # seconds
+_market_cache = SharedResultCache(maxsize=2048, ttl=MARKET_CACHE_TTL)
 
 
 class FDADrugChecker:
@@ -85,8 +92,9 @@ def start(drug: str, scoring_system=None) -> dict:
     Returns:
         Dictionary with FDA data, formatted output, and market experience score
     """
-    fda = FDADrugChecker()
-    fda_data = fda.search(drug)
+    fda_data = _market_cache.get_or_compute(
+        drug.strip().lower(), lambda: FDADrugChecker().search(drug)
+    )
 
     if fda_data:
         output_text = format_fda_output(
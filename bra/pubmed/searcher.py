@@ -3,8 +3,44 @@ pubmed/searcher.py
 PubMed Evidence Searcher Module
 """
 
+import os
+import threading
 import requests
 import xml.etree.ElementTree as ET
+from requests.adapters import HTTPAdapter
+from utils.shared_cache import SharedResultCache
+from utils.disk_cache import DiskCache, cache_key
+
+
+# One keep-alive session for every E-utilities call, so concurrent tasks
+# reuse TLS connections to eutils.ncbi.nlm.nih.gov instead of reconnecting
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# NCBI allows 3 requests/second without an API key and 10 with one; cap the
+# requests in flight accordingly so parallel tasks don't trip the limit
+NCBI_API_KEY = os.getenv("NCBI_API_KEY", "")
+PUBMED_MAX_CONCURRENCY = 10 if NCBI_API_KEY else 3
+_request_slots = threading.BoundedSemaphore(PUBMED_MAX_CONCURRENCY)
+
+# (connect, read) seconds; a stalled connection must not hold a slot forever
+PUBMED_TIMEOUT = (5, 30)
+
+
+# Evidence for a (drug, condition) pair is shared by every task asking for it,
+# and kept on disk across runs since the RCT literature changes slowly
+SEARCH_CACHE_TTL = 86400  # seconds
+_search_cache = SharedResultCache(maxsize=2048, ttl=SEARCH_CACHE_TTL)
+SEARCH_DISK_CACHE_TTL = int(os.getenv("PUBMED_CACHE_TTL", str(7 * 86400)))  # seconds, 0 disables
+_search_disk_cache = DiskCache("pubmed_search", ttl=SEARCH_DISK_CACHE_TTL)
+
+
+class _ConclusionsUnavailable(Exception):
+    """The RCT count was found but fetching the study abstracts failed"""
+
+    def __init__(self, rct_count):
+        super().__init__(f"efetch failed for a search with {rct_count} RCTs")
+        self.rct_count = rct_count
 
 
 class PubMedSearcher:
@@ -16,6 +52,17 @@ class PubMedSearcher:
 
     def search(self, drug, condition):
         """Returns total RCT count and conclusions of top 5 studies"""
+        try:
+            rct_count, conclusions = self._search(drug, condition)
+        except Exception:
+            return 0, []
+        return rct_count, conclusions or []
+
+    def _search(self, drug, condition):
+        """
+        Like search(), but raises when the esearch request fails;
+        conclusions are None when the efetch request fails
+        """
         query = f'("{drug}"[TIAB]) AND ("{condition}"[TIAB]) AND (Randomized Controlled Trial[Filter])'
         
         params = {
@@ -25,20 +72,22 @@ class PubMedSearcher:
             "retmode": "xml"
         }
         if self.email: params["email"] = self.email
+        if NCBI_API_KEY: params["api_key"] = NCBI_API_KEY
 
-        try:
-            search_res = requests.get(self.SEARCH_URL, params=params)
-            search_root = ET.fromstring(search_res.content)
-            count = int(search_root.find(".//Count").text)
-            id_list = [id_node.text for id_node in search_root.findall(".//IdList/Id")]
-            conclusions = self.fetch_conclusions(id_list) if id_list else []
-            
-            return count, conclusions
-        except Exception:
-            return 0, []
+        with _request_slots:
+            search_res = _session.get(self.SEARCH_URL, params=params, timeout=PUBMED_TIMEOUT)
+        search_root = ET.fromstring(search_res.content)
+        count = int(search_root.find(".//Count").text)
+        id_list = [id_node.text for id_node in search_root.findall(".//IdList/Id")]
+        conclusions = self.fetch_conclusions(id_list) if id_list else []
+        
+        return count, conclusions
 
     def fetch_conclusions(self, id_list):
-        """Fetches abstracts and attempts to extract the conclusion section"""
+        """
+        Fetches abstracts and attempts to extract the conclusion section
+        Returns None when the request fails
+        """
         ids = ",".join(id_list)
         params = {
             "db": "pubmed",
@@ -46,9 +95,11 @@ class PubMedSearcher:
             "retmode": "xml",
             "rettype": "abstract"
         }
+        if NCBI_API_KEY: params["api_key"] = NCBI_API_KEY
         
         try:
-            fetch_res = requests.get(self.FETCH_URL, params=params)
+            with _request_slots:
+                fetch_res = _session.get(self.FETCH_URL, params=params, timeout=PUBMED_TIMEOUT)
             fetch_root = ET.fromstring(fetch_res.content)
             
             results = []
@@ -71,7 +122,21 @@ class PubMedSearcher:
             
             return results
         except Exception:
-            return []
+            return None
+
+
+def _cached_search(key: str, drug: str, condition: str, email: str = None):
+    """Search PubMed through the disk cache; failed searches are not stored"""
+    cached = _search_disk_cache.get(key)
+    if cached is not None:
+        return cached["rct_count"], cached["conclusions"]
+
+    rct_count, conclusions = PubMedSearcher(email=email)._search(drug, condition)
+    if conclusions is None:
+        # Raising keeps the in-process cache from storing it either
+        raise _ConclusionsUnavailable(rct_count)
+    _search_disk_cache.set(key, {"rct_count": rct_count, "conclusions": conclusions})
+    return rct_count, conclusions
 
 
 def format_pubmed_output(drug, condition, rct_count, conclusions):
@@ -99,8 +164,15 @@ def start(drug: str, condition: str, email: str = None, scoring_system=None) ->
     Returns:
         Dictionary with RCT count, conclusions, and formatted output
     """
-    pubmed = PubMedSearcher(email=email)
-    rct_count, top_conclusions = pubmed.search(drug, condition)
+    key = cache_key("pubmed", drug.strip().lower(), condition.strip().lower())
+    try:
+        rct_count, top_conclusions = _search_cache.get_or_compute(
+            key, lambda: _cached_search(key, drug, condition, email)
+        )
+    except _ConclusionsUnavailable as e:
+        rct_count, top_conclusions = e.rct_count, []
+    except Exception:
+        rct_count, top_conclusions = 0, []
     
     output_text = format_pubmed_output(drug, condition, rct_count, top_conclusions)
     
@@ -9,10 +9,17 @@ from typing import Dict, List, Any, Optional
 from google import genai
 import glob
 from google.genai import types
+from utils.disk_cache import cache_key
+from utils.shared_cache import SharedResultCache
 
 # Load environment variables
 load_dotenv()
 
+# RMM tables depend only on the ADR output and patient context, which are the
+# same for every drug of a patient, so identical inputs reuse one generation
+RMM_CACHE_TTL = 3600  # seconds
+_rmm_cache = SharedResultCache(maxsize=64, ttl=RMM_CACHE_TTL)
+
 class Step4_RMM_Generator:
     """
     Step 4: Risk Minimization Measures (RMM) Generator (Patient-Context-Aware)
@@ -856,21 +863,28 @@ def start(input_file: Optional[str] = None, scoring_system=None) -> List[Dict[st
 
     # 4. Process RMM Generation with patient context
     try:
-        # Generate the clinical RMM table with patient context
-        full_output = generator.generate_rmm_table(file_path, patient_data)
+        with open(file_path, 'r') as f:
+            input_key = cache_key(f.read(), patient_data)
         
-        # Display the formatted clinical findings
-        generator.print_rmm_report(full_output)
+        def generate():
+            # Generate the clinical RMM table with patient context
+            full_output = generator.generate_rmm_table(file_path, patient_data)
+            
+            # Display the formatted clinical findings
+            generator.print_rmm_report(full_output)
+            
+            # 6. Persist the RMM results locally for the system log
+            output_save_path = "../rmm_output.json"
+            with open(output_save_path, 'w') as f:
+                json.dump(full_output, f, indent=2)
+                
+            print(f"✓ RMM data processed and saved to local log: {output_save_path}")
+            return full_output
+        
+        full_output = _rmm_cache.get_or_compute(input_key, generate)
         
         # 5. Extract the rmm_table attribute into memory
         rmm_table_data = full_output.get("rmm_table", [])
-        
-        # 6. Persist the RMM results locally for the system log
-        output_save_path = "../rmm_output.json"
-        with open(output_save_path, 'w') as f:
-            json.dump(full_output, f, indent=2)
-            
-        print(f"✓ RMM data processed and saved to local log: {output_save_path}")
 
         # 7. Delete the original input file before returning
         # try:
@@ -3,7 +3,7 @@ Centralized Scoring Configuration - EXACT VALUES FROM iBR MATRIX
 All scoring matrices matching the official iBR scoring system
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, Any
 from enum import Enum
 
@@ -20,16 +20,13 @@ class ScoreEntry:
     description: str
     weighted_score: int
     score_type: ScoreType
+    # Backward-compatible aliases, materialized once at construction so
+    # readers (e.g. /scoring/config) do plain attribute lookups
+    weight: int = field(init=False, repr=False)
+    score: int = field(init=False, repr=False, default=1)
     
-    @property
-    def weight(self) -> int:
-        """For backward compatibility"""
-        return self.weighted_score
-    
-    @property
-    def score(self) -> int:
-        """For backward compatibility - return 1 for all"""
-        return 1
+    def __post_init__(self):
+        self.weight = self.weighted_score
 
 
 class ScoringConfig:
@@ -3,9 +3,11 @@
 # scoring/scoring_system.py
 # ================================
 
-import json
+import threading
 from datetime import datetime
 from typing import Dict, Any, List
+from scoring.config import ScoringConfig
+from utils.file_loader import dump_json_bytes
 
 
 class ScoringSystem:
@@ -16,28 +18,30 @@ class ScoringSystem:
         self.results = {}
         self.benefit_scores = []
         self.risk_scores = []
+        # Analysis stages run in parallel threads and report into one instance
+        self._lock = threading.Lock()
     
     def add_analysis(self, analysis_name: str, data: Dict[str, Any]):
         """Add analysis results and track benefit/risk scores"""
-        self.results[analysis_name] = data
-        
-        # Track benefit and risk scores separately
-        if isinstance(data, dict) and 'weighted_score' in data:
-            score_type = data.get('score_type', '')
-            weighted_score = data.get('weighted_score', 0)
+        with self._lock:
+            self.results[analysis_name] = data
             
-            if score_type == 'benefit':
-                self.benefit_scores.append(weighted_score)
-            elif score_type == 'risk':
-                self.risk_scores.append(weighted_score)
+            # Track benefit and risk scores separately
+            if isinstance(data, dict) and 'weighted_score' in data:
+                score_type = data.get('score_type', '')
+                weighted_score = data.get('weighted_score', 0)
+                
+                if score_type == 'benefit':
+                    self.benefit_scores.append(weighted_score)
+                elif score_type == 'risk':
+                    self.risk_scores.append(weighted_score)
     
     def calculate_brr(self) -> Dict[str, Any]:
         """Calculate Benefit-Risk Ratio"""
-        from scoring.config import ScoringConfig
         return ScoringConfig.calculate_brr(self.benefit_scores, self.risk_scores)
     
-    def save_to_json(self):
-        """Save all results to JSON file including BRR"""
+    def to_json_bytes(self) -> bytes:
+        """Serialize all results including BRR"""
         # Calculate BRR before saving
         brr_data = self.calculate_brr()
         
@@ -47,7 +51,16 @@ class ScoringSystem:
             "benefit_risk_ratio": brr_data
         }
         
-        with open(self.output_file, 'w') as f:
-            json.dump(output_data, f, indent=2)
+        return dump_json_bytes(output_data)
+    
+    def save_to_json(self, writer=None, payload: bytes | None = None):
+        """Save all results (or a payload from to_json_bytes) to JSON file, queued on writer if given"""
+        if payload is None:
+            payload = self.to_json_bytes()
+        
+        if writer is not None:
+            return writer.put(self.output_file, payload)
+        
+        with open(self.output_file, 'wb') as f:
+            f.write(payload)
         return self.output_file
-
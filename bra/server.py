@@ -5,6 +5,7 @@ Non-blocking database operations
 """
 
 from flask import Flask, request, jsonify
+import logging
 import os
 import time
 
@@ -13,10 +14,10 @@ from dotenv import load_dotenv
 load_dotenv()  # This must be called BEFORE importing queue_manager
 
 from utils.queue_manager.queue_manager import job_queue
+from utils.file_loader import write_handoff_file
 
 app = Flask(__name__)
 
-import json
 from datetime import datetime
 
 
@@ -88,8 +89,7 @@ def analyze():
         return jsonify({"error": "No medications found in any diagnosis"}), 400
     
     # Save simplified input
-    with open("adrs_input.json",'w') as f:
-        json.dump(simplify_medical_data(request_data), f, indent=2)
+    write_handoff_file("adrs_input", simplify_medical_data(request_data))
     
     try:
         job_id = job_queue.submit_job(request_data)
@@ -302,6 +302,9 @@ def index():
 
 
 if __name__ == "__main__":
+    # LOG_LEVEL=DEBUG shows every analysis stage, WARNING only problems
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(message)s")
+    
     print("="*80)
     print("Drug Analysis API Server v2.0")
     print("With PostgreSQL Database Integration")
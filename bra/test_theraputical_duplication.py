@@ -0,0 +1,57 @@
+from theraputical_duplication import KeywordMatcher, TherapeuticDuplicationChecker
+
+TEXTS = [
+    "hmg-coa reductase inhibitor [epc]",
+    "angiotensin converting enzyme inhibitor [epc], ace inhibit",
+    "nonsteroidal anti-inflammatory drug [epc] cox-2 cyclooxygenase inhibitors",
+    "calcium channel blocker beta blocker arb",
+    "proton pump inhibitor",
+    "",
+    "atorvastatin calcium",
+    "metformin hydrochloride",
+    "amlodipine and benazepril",
+    "aspirin",
+    "statin",
+]
+
+
+def old_find(keywords, text):
+    """The matching loop KeywordMatcher replaced"""
+    return {keyword for keyword in keywords if keyword in text}
+
+
+def check_matcher(keywords):
+    matcher = KeywordMatcher(keywords)
+    fallback = KeywordMatcher(keywords)
+    fallback._automaton = None  # force the first-character scan
+
+    for text in TEXTS + list(keywords):
+        expected = old_find(keywords, text)
+        assert matcher.find(text) == expected, text
+        assert fallback.find(text) == expected, text
+
+        mask = matcher.find_mask(text)
+        assert {k for i, k in enumerate(matcher.keywords) if mask >> i & 1} == expected, text
+
+
+def test_keyword_matcher_matches_old_loop():
+    checker = TherapeuticDuplicationChecker(verbose=False)
+    check_matcher(checker.class_indicators)
+    check_matcher(checker.specific_mechanisms)
+    check_matcher(sorted(checker._known_drugs))
+
+
+def test_match_tokens_matches_old_loop():
+    checker = TherapeuticDuplicationChecker(verbose=False)
+    for med in TEXTS[6:] + ["pril", "statin"]:
+        contained, related = checker._match_tokens(med)
+        assert contained == {drug for drug in checker._known_drugs if drug in med}, med
+        assert related == {
+            drug for drug in checker._known_drugs if drug in med or med in drug
+        }, med
+
+
+if __name__ == "__main__":
+    test_keyword_matcher_matches_old_loop()
+    test_match_tokens_matches_old_loop()
+    print("keyword matching OK")
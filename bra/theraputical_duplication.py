@@ -1,15 +1,176 @@
 import json
+import asyncio
+import importlib.util
+import logging
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional, Tuple
 import os
+import re
+import sys
+import sqlite3
+import threading
 from datetime import datetime
 from dotenv import load_dotenv
 import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
 from itertools import combinations
 
+# Faster JSON decoding for large FDA label payloads (optional)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Async HTTP client for concurrent per-drug label fetches (optional; HTTP/2 needs h2)
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+HTTP2_AVAILABLE = HTTPX_AVAILABLE and importlib.util.find_spec("h2") is not None
+
+# Aho-Corasick automaton for multi-pattern drug/class/mechanism matching (optional)
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 # Load environment variables
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available"""
+    
+    __slots__ = ('rate', 'capacity', '_tokens', '_updated', '_lock')
+    
+    def __init__(self, rate_per_minute: float, capacity: int):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _try_acquire(self) -> float:
+        """Take a token if available; otherwise return seconds until one is"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+    
+    def acquire(self):
+        while (wait := self._try_acquire()) > 0:
+            time.sleep(wait)
+    
+    async def acquire_async(self):
+        while (wait := self._try_acquire()) > 0:
+            await asyncio.sleep(wait)
+
+
+class KeywordMatcher:
+    """Find which of a fixed set of keywords occur in a text (Aho-Corasick when available)"""
+    
+    __slots__ = ('keywords', '_bits', '_by_first_char', '_automaton')
+    
+    def __init__(self, keywords):
+        self.keywords = tuple(dict.fromkeys(keywords))
+        self._bits = {keyword: 1 << i for i, keyword in enumerate(self.keywords)}
+        
+        # First trie level for the fallback scan: only keywords whose first
+        # character occurs in the text can match
+        self._by_first_char = {}
+        for keyword in self.keywords:
+            self._by_first_char.setdefault(keyword[0], []).append(keyword)
+        
+        self._automaton = None
+        if AHOCORASICK_AVAILABLE and self.keywords:
+            automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+            self._automaton = automaton
+    
+    def find(self, text: str) -> frozenset:
+        """Keywords that appear anywhere in text (single pass with the automaton)"""
+        if self._automaton is not None:
+            return frozenset(keyword for _, keyword in self._automaton.iter(text))
+        chars = set(text)
+        return frozenset(
+            keyword
+            for first_char, keywords in self._by_first_char.items() if first_char in chars
+            for keyword in keywords if keyword in text
+        )
+    
+    def find_mask(self, text: str) -> int:
+        """Bitmask of the keywords found in text (bit i is keywords[i])"""
+        mask = 0
+        for keyword in self.find(text):
+            mask |= self._bits[keyword]
+        return mask
+
+
+# FDA label cache (bump CACHE_VERSION whenever the therapeutic_info schema changes)
+CACHE_VERSION = 1
+FDA_CACHE_PATH = os.getenv("FDA_CACHE_PATH", os.path.expanduser("~/.cache/fda_labels.sqlite"))
+FDA_CACHE_TTL = 86400  # seconds
+FDA_MEM_CACHE_SIZE = 4096  # entries kept in the per-instance LRU
+
+# FDA request concurrency
+FDA_MAX_WORKERS = 8
+# openFDA allows 240 requests/min with or without a key (a key only raises
+# the daily cap); override to share the quota with other clients
+FDA_RATE_PER_MINUTE = float(os.getenv("FDA_RATE_PER_MINUTE", "240"))
+FDA_BATCH_SIZE = 50  # medicines per OR-joined label search
+
+# FDA label text fields kept in therapeutic_info, each truncated to MAX_FIELD_LEN
+LABEL_TEXT_FIELDS = ('mechanism_of_action', 'indications_and_usage', 'drug_interactions')
+MAX_FIELD_LEN = 500
+
+# FDA classification codes ([EPC], [MoA], [CS]) appended to every pharmacologic class
+FDA_CLASS_CODE_RE = re.compile(r"\[(?:epc|moa|cs)\]")
+
+@dataclass(slots=True)
+class MedicineFeatures:
+    """Per-medicine normalized fields, computed once before pair comparison"""
+    name: str
+    lower: str
+    cls: Optional[str]
+    class_id: int  # index into drug_classes, -1 when unclassified
+    # Membership bitmasks: bit i refers to appropriate_combinations[i] /
+    # indication_overlaps[i], so pair checks are integer ANDs
+    combo_first_mask: int  # name contains appropriate_combinations[i][0]
+    combo_second_mask: int  # name contains appropriate_combinations[i][1]
+    group1_mask: int  # medicine in indication_overlaps[i]['group1']
+    group2_mask: int  # medicine in indication_overlaps[i]['group2'] (cross-group rows only)
+    pharm: str  # lowercased FDA pharmacologic class
+    moa: str  # lowercased FDA mechanism of action
+    pharm_tokens: int  # bitmask of class indicators found in pharm
+    pharm_words: int  # bitmask of meaningful words in pharm
+    moa_tokens: int  # bitmask of specific mechanisms found in moa
+
+
+@dataclass(slots=True)
+class PairResult:
+    """Outcome of comparing two medicines (converted to a dict in the report)"""
+    medicine_1: str
+    medicine_2: str
+    category: str  # 'redundant', 'overlap' or 'unique'
+    reason: str
+    recommendation: str
+    evidence: str
+
+
 class TherapeuticDuplicationChecker:
     """
     Therapeutic Duplication Analyzer - Simplified 3-Category Approach
@@ -18,11 +179,36 @@ class TherapeuticDuplicationChecker:
     Category 3: Some overlap but with rationale (CAUTION)
     """
     
-    def __init__(self):
+    __slots__ = (
+        'verbose', 'fda_api_key', 'fda_base_url',
+        '_mem_cache', '_cache_lock', '_disk_cache', 'session', '_bucket',
+        'drug_classes', 'appropriate_combinations', 'indication_overlaps',
+        'class_indicators', 'class_stopwords', 'specific_mechanisms',
+        'critical_monotherapy_warnings', '_monotherapy_rules',
+        '_known_drugs', '_drug_matcher', '_class_matcher', '_mechanism_matcher',
+        '_token_cache', '_mask_cache', '_norm_cache', '_word_bits', '_features',
+        '_class_ids', '_diuretic_class_ids', '_drug_class_rank', 'drug_to_class',
+        '_overlap_groups',
+    )
+    
+    def __init__(self, verbose: bool = True):
         """Initialize with FDA API key"""
+        self.verbose = verbose  # per-pair progress output
         self.fda_api_key = os.getenv("FDA_API_KEY", "")
         self.fda_base_url = "https://api.fda.gov/drug/label.json"
         
+        # FDA label cache: in-process LRU backed by SQLite on disk
+        self._mem_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._disk_cache = self._open_disk_cache(FDA_CACHE_PATH)
+        
+        # One keep-alive session shared by all extraction threads
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+        
+        # Only real network calls consume FDA quota; cache hits never wait
+        self._bucket = TokenBucket(FDA_RATE_PER_MINUTE, capacity=FDA_MAX_WORKERS)
+        
         # Known drug class groupings (for strict duplication detection)
         self.drug_classes = {
             # Statins (HMG-CoA Reductase Inhibitors)
@@ -272,85 +458,426 @@ class TherapeuticDuplicationChecker:
             },
         ]
         
+        # Key terms that indicate same pharmacologic class (specific drug classes only)
+        self.class_indicators = [
+            'statin', 'hmg-coa reductase inhibitor',
+            'nsaid', 'nonsteroidal anti-inflammatory',
+            'beta blocker', 'beta-adrenergic blocker',
+            'ace inhibitor', 'angiotensin converting enzyme inhibitor',
+            'arb', 'angiotensin receptor blocker', 'angiotensin ii receptor antagonist',
+            'calcium channel blocker', 'calcium channel antagonist',
+            'proton pump inhibitor',
+            'h2 receptor antagonist', 'histamine h2 receptor antagonist',
+            'ssri', 'selective serotonin reuptake inhibitor',
+            'snri', 'serotonin norepinephrine reuptake inhibitor',
+            'loop diuretic',
+            'thiazide diuretic',
+            'potassium-sparing diuretic', 'aldosterone antagonist',
+            'sulfonylurea',
+            'dpp-4 inhibitor',
+            'sglt2 inhibitor',
+            'glp-1 agonist', 'glucagon-like peptide-1 receptor agonist',
+            'benzodiazepine',
+            'opioid agonist',
+            'direct oral anticoagulant', 'factor xa inhibitor', 'thrombin inhibitor',
+            'penicillin',
+            'cephalosporin',
+            'macrolide',
+            'fluoroquinolone',
+        ]
+        
+        # Generic terms ignored when comparing pharmacologic class wording
+        self.class_stopwords = {
+            'and', 'or', 'the', 'a', 'an', 'in', 'of', 'for', 'to', 'with', 'by', 'as', 'is', 'at',
+            'agent', 'drug', 'class', 'inhibitor', 'antagonist', 'agonist', 'receptor', 'blocker'
+        }
+        
+        # Specific mechanism patterns (not just generic keywords)
+        self.specific_mechanisms = [
+            # Enzyme inhibition (specific enzymes)
+            'hmg-coa reductase',
+            'ace inhibit',  # angiotensin converting enzyme
+            'cox-1',
+            'cox-2',
+            'cyclooxygenase',
+            'proton pump',
+            'dpp-4',
+            'mao inhibit',
+            'phosphodiesterase',
+            'aromatase',
+            
+            # Receptor interactions (specific receptors)
+            'beta-1 adrenergic',
+            'beta-2 adrenergic',
+            'beta adrenergic receptor',
+            'alpha-1 adrenergic',
+            'alpha-2 adrenergic',
+            'serotonin reuptake',
+            'norepinephrine reuptake',
+            'dopamine reuptake',
+            'angiotensin ii receptor',
+            'histamine h1 receptor',
+            'histamine h2 receptor',
+            'opioid receptor',
+            'gaba receptor',
+            'nmda receptor',
+            
+            # Ion channels
+            'calcium channel',
+            'sodium channel',
+            'potassium channel',
+            
+            # Transport/reuptake
+            'serotonin transporter',
+            'norepinephrine transporter',
+            'dopamine transporter',
+            
+            # Other specific mechanisms
+            'dihydrofolate reductase',
+            'thrombin inhibit',
+            'factor xa inhibit',
+            'platelet aggregation',
+        ]
+        
         # Critical single-drug warnings (need special handling)
         self.critical_monotherapy_warnings = {
             'asthma_saba_only': {
                 'drugs': ['albuterol', 'levalbuterol', 'pirbuterol'],
                 'required_with': ['fluticasone', 'budesonide', 'beclomethasone', 'mometasone', 'ciclesonide'],
                 'diagnosis_keywords': ['asthma'],
-                'warning': 'CRITICAL GINA 2024 VIOLATION: SABA-only treatment is CONTRAINDICATED for asthma. Patient must receive ICS-containing controller therapy.'
+                'warning': 'CRITICAL GINA 2024 VIOLATION: SABA-only treatment is CONTRAINDICATED for asthma. Patient must receive ICS-containing controller therapy.',
+                'type': 'SABA_ONLY_ASTHMA',
+                'guideline': 'GINA 2024',
+                'action_required': 'Add ICS-containing controller therapy immediately'
             }
         }
+        
+        # Monotherapy rules as drug sets, checked against one token scan per patient;
+        # diagnosis keywords are one compiled alternation (None: never applies)
+        self._monotherapy_rules = [
+            (
+                re.compile('|'.join(map(re.escape, warning['diagnosis_keywords'])))
+                if warning['diagnosis_keywords'] else None,
+                frozenset(warning['drugs']),
+                frozenset(warning['required_with']),
+                warning
+            )
+            for warning in self.critical_monotherapy_warnings.values()
+        ]
+        
+        # Every known drug token, matched once per medicine by _match_tokens
+        self._known_drugs = sorted(
+            {drug.lower() for drug_list in self.drug_classes.values() for drug in drug_list}
+            | {drug for combo in self.appropriate_combinations for drug in combo}
+            | {drug for overlap in self.indication_overlaps for drug in overlap['group1'] + overlap['group2']}
+            | {drug for warning in self.critical_monotherapy_warnings.values()
+               for drug in warning['drugs'] + warning['required_with']}
+        )
+        self._drug_matcher = KeywordMatcher(self._known_drugs)
+        self._class_matcher = KeywordMatcher(self.class_indicators)
+        self._mechanism_matcher = KeywordMatcher(self.specific_mechanisms)
+        self._token_cache = {}  # medicine name -> matched drugs, reset per analyze()
+        self._mask_cache = {}  # medicine name -> combo/group masks, reset per analyze()
+        self._norm_cache = {}  # FDA class/MoA text -> tokens, reset per analyze()
+        self._word_bits = {}  # meaningful class word -> bit in pharm_words masks, reset per analyze()
+        self._features = {}
+        
+        # Integer class IDs so pair checks compare ints, not class names
+        self._class_ids = {class_name: i for i, class_name in enumerate(self.drug_classes)}
+        self._diuretic_class_ids = frozenset(
+            class_id for class_name, class_id in self._class_ids.items() if 'diuretic' in class_name
+        )
+        
+        # Position of each classified drug in declaration order (later entries win)
+        self._drug_class_rank = {}
+        for class_name, drug_list in self.drug_classes.items():
+            for drug in drug_list:
+                self._drug_class_rank[drug.lower()] = (len(self._drug_class_rank), class_name)
+        
+        # Inverted drug -> class index for exact names
+        self.drug_to_class = {
+            drug: self._class_for_tokens(self._match_tokens(drug)[1]) for drug in self._drug_class_rank
+        }
+        
+        # Indication overlap groups as sets, matched against per-medicine tokens.
+        # Same-group rows (ICS + ICS, ...) and rows with an empty group2 reduce to
+        # a single "both medicines in group1" check, stored with group2=None.
+        self._overlap_groups = []
+        for overlap in self.indication_overlaps:
+            group1 = frozenset(overlap['group1'])
+            group2 = frozenset(overlap['group2'])
+            if not group2 or group2 == group1:
+                group2 = None
+            self._overlap_groups.append((group1, group2, overlap))
     
     # ============================================================================
     # PART 1: EXTRACT THERAPEUTIC DATA FROM FDA
     # ============================================================================
     
+    def _open_disk_cache(self, path: str) -> Optional[sqlite3.Connection]:
+        """Open (or create) the on-disk FDA label cache; None if unavailable"""
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fda_labels "
+                "(key TEXT PRIMARY KEY, value TEXT, created_at REAL)"
+            )
+            conn.commit()
+            return conn
+        except (OSError, sqlite3.Error) as e:
+            log.warning("FDA label disk cache disabled: %s", e)
+            return None
+    
+    def _cache_key(self, medicine_name: str) -> str:
+        return f"v{CACHE_VERSION}:{medicine_name.lower().strip()}"
+    
+    def _cache_get(self, medicine_name: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Return (hit, therapeutic_info); a cached None means FDA had no label"""
+        key = self._cache_key(medicine_name)
+        now = time.time()
+        
+        with self._cache_lock:
+            entry = self._mem_cache.get(key)
+            if entry and entry[0] > now:
+                self._mem_cache.move_to_end(key)
+                return True, self._with_drug_name(entry[1], medicine_name)
+            
+            if self._disk_cache is None:
+                return False, None
+            
+            try:
+                row = self._disk_cache.execute(
+                    "SELECT value, created_at FROM fda_labels WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error:
+                return False, None
+            
+            if not row or row[1] + FDA_CACHE_TTL <= now:
+                return False, None
+            
+            value = json.loads(row[0])
+            self._remember(key, row[1] + FDA_CACHE_TTL, value)
+            return True, self._with_drug_name(value, medicine_name)
+    
+    def _remember(self, key: str, expires_at: float, value: Optional[Dict[str, Any]]):
+        """Insert into the in-process LRU (caller holds _cache_lock)"""
+        self._mem_cache[key] = (expires_at, value)
+        self._mem_cache.move_to_end(key)
+        if len(self._mem_cache) > FDA_MEM_CACHE_SIZE:
+            self._mem_cache.popitem(last=False)
+    
+    @staticmethod
+    def _with_drug_name(value: Optional[Dict[str, Any]], medicine_name: str) -> Optional[Dict[str, Any]]:
+        """Copy a cached entry, keeping the caller's spelling of the drug name"""
+        return dict(value, drug_name=medicine_name) if value else value
+    
+    def _cache_set(self, medicine_name: str, value: Optional[Dict[str, Any]]):
+        key = self._cache_key(medicine_name)
+        now = time.time()
+        
+        with self._cache_lock:
+            self._remember(key, now + FDA_CACHE_TTL, value)
+            
+            if self._disk_cache is None:
+                return
+            
+            try:
+                self._disk_cache.execute(
+                    "INSERT OR REPLACE INTO fda_labels (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), now)
+                )
+                self._disk_cache.commit()
+            except sqlite3.Error as e:
+                log.warning("Could not cache FDA data for %s: %s", medicine_name, e)
+    
+    def _label_params(self, search_query: str, limit: int = 1) -> Dict[str, Any]:
+        params = {
+            'search': search_query,
+            'limit': limit
+        }
+        if self.fda_api_key:
+            params['api_key'] = self.fda_api_key
+        return params
+    
+    def _label_searches(self, medicine_name: str) -> List[str]:
+        """Per-drug searches, tried in order: generic/brand name, then free text"""
+        return [
+            f'openfda.generic_name:"{medicine_name}" OR openfda.brand_name:"{medicine_name}"',
+            f'"{medicine_name}"'
+        ]
+    
+    def _decode(self, response) -> Dict[str, Any]:
+        if ORJSON_AVAILABLE:
+            return orjson.loads(response.content)
+        return response.json()
+    
+    def _fda_get(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Rate-limited GET against the FDA label endpoint"""
+        self._bucket.acquire()
+        response = self.session.get(self.fda_base_url, params=params, timeout=30)
+        response.raise_for_status()
+        return self._decode(response)
+    
+    async def _afda_get(self, client, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Async rate-limited GET against the FDA label endpoint"""
+        await self._bucket.acquire_async()
+        response = await client.get(self.fda_base_url, params=params)
+        response.raise_for_status()
+        return self._decode(response)
+    
+    def _store_label(self, medicine_name: str, data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Parse the first label of a search response (None if empty) and cache it"""
+        therapeutic_info = self._parse_label(medicine_name, data['results'][0]) if data else None
+        self._cache_set(medicine_name, therapeutic_info)
+        return therapeutic_info
+    
     def extract_therapeutic_data(self, medicine_name: str) -> Optional[Dict[str, Any]]:
-        """Extract Mechanism of Action, Indication, and Pharmacologic Class"""
+        """Extract Mechanism of Action, Indication, and Pharmacologic Class (cached)"""
+        hit, cached = self._cache_get(medicine_name)
+        if hit:
+            return cached
+        
         try:
-            # Query FDA API
-            search_query = f'openfda.generic_name:"{medicine_name}" OR openfda.brand_name:"{medicine_name}"'
-            params = {
-                'search': search_query,
-                'limit': 1
-            }
-            if self.fda_api_key:
-                params['api_key'] = self.fda_api_key
-            
-            response = requests.get(self.fda_base_url, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            
-            if 'results' not in data or len(data['results']) == 0:
-                # Try alternative search
-                params['search'] = f'"{medicine_name}"'
-                response = requests.get(self.fda_base_url, params=params, timeout=30)
-                response.raise_for_status()
-                data = response.json()
-                
-                if 'results' not in data or len(data['results']) == 0:
-                    return None
-            
-            label_data = data['results'][0]
-            
-            # Extract therapeutic information
-            therapeutic_info = {
-                'drug_name': medicine_name,
-                'mechanism_of_action': self._extract_text(label_data, 'mechanism_of_action'),
-                'indications_and_usage': self._extract_text(label_data, 'indications_and_usage'),
-                'pharmacologic_class': self._extract_pharmacologic_class(label_data),
-                'drug_interactions': self._extract_text(label_data, 'drug_interactions')
-            }
+            for search_query in self._label_searches(medicine_name):
+                data = self._fda_get(self._label_params(search_query))
+                if data.get('results'):
+                    break
+            else:
+                data = None
             
-            return therapeutic_info
+            return self._store_label(medicine_name, data)
             
         except Exception as e:
-            print(f"Error extracting data for {medicine_name}: {str(e)}")
+            log.warning("Error extracting data for %s: %s", medicine_name, e)
             return None
     
-    def _extract_text(self, label_data: Dict[str, Any], field_name: str) -> Optional[str]:
-        """Helper to extract text from FDA label field"""
-        field_data = label_data.get(field_name, [])
-        if field_data and len(field_data) > 0:
-            text = "\n\n".join(field_data)
-            return text[:500] if len(text) > 500 else text
-        return None
+    async def _aextract_therapeutic_data(self, client, semaphore, medicine_name: str) -> Optional[Dict[str, Any]]:
+        """Async variant of extract_therapeutic_data"""
+        hit, cached = self._cache_get(medicine_name)
+        if hit:
+            return cached
+        
+        async with semaphore:
+            try:
+                for search_query in self._label_searches(medicine_name):
+                    data = await self._afda_get(client, self._label_params(search_query))
+                    if data.get('results'):
+                        break
+                else:
+                    data = None
+                
+                return self._store_label(medicine_name, data)
+                
+            except Exception as e:
+                log.warning("Error extracting data for %s: %s", medicine_name, e)
+                return None
+    
+    async def _aextract_many(self, medicine_names: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Fetch labels concurrently over one (HTTP/2 when available) connection pool"""
+        limits = httpx.Limits(max_connections=16)
+        semaphore = asyncio.Semaphore(FDA_MAX_WORKERS)
+        async with httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=limits, timeout=30) as client:
+            return await asyncio.gather(
+                *(self._aextract_therapeutic_data(client, semaphore, name) for name in medicine_names)
+            )
     
-    def _extract_pharmacologic_class(self, label_data: Dict[str, Any]) -> Optional[str]:
-        """Extract pharmacologic class from openfda section"""
-        openfda = label_data.get('openfda', {})
+    def _extract_many(self, medicine_names: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Per-drug lookups: httpx/asyncio when installed, thread pool otherwise"""
+        if HTTPX_AVAILABLE:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return asyncio.run(self._aextract_many(medicine_names))
+        
+        with ThreadPoolExecutor(max_workers=FDA_MAX_WORKERS) as executor:
+            return list(executor.map(self.extract_therapeutic_data, medicine_names))
+    
+    def extract_therapeutic_data_batch(self, medicine_names: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Extract therapeutic data for many medicines with OR-joined FDA searches
+        Names missing from the batched response fall back to extract_therapeutic_data
+        """
+        results = {}
+        pending = []
+        
+        for name in dict.fromkeys(medicine_names):
+            hit, cached = self._cache_get(name)
+            if hit:
+                results[name] = cached
+            else:
+                pending.append(name)
+        
+        unresolved = []
+        for start in range(0, len(pending), FDA_BATCH_SIZE):
+            chunk = pending[start:start + FDA_BATCH_SIZE]
+            labels = self._fetch_label_batch(chunk)
+            
+            for name in chunk:
+                label_data = labels.get(name)
+                if label_data is None:
+                    unresolved.append(name)
+                    continue
+                therapeutic_info = self._parse_label(name, label_data)
+                self._cache_set(name, therapeutic_info)
+                results[name] = therapeutic_info
+        
+        # Per-drug fallback (includes the free-text search)
+        if unresolved:
+            for name, therapeutic_info in zip(unresolved, self._extract_many(unresolved)):
+                results[name] = therapeutic_info
+        
+        return results
+    
+    def _fetch_label_batch(self, medicine_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Run one OR-joined label search and map returned labels back to medicine names"""
+        search_query = " OR ".join(
+            f'openfda.generic_name:"{name}" OR openfda.brand_name:"{name}"'
+            for name in medicine_names
+        )
+        params = self._label_params(search_query, limit=min(len(medicine_names) * 2, 100))
         
-        # Try multiple fields
-        pharm_class = openfda.get('pharm_class_epc', [])
-        if not pharm_class:
-            pharm_class = openfda.get('pharm_class_moa', [])
-        if not pharm_class:
-            pharm_class = openfda.get('pharm_class_cs', [])
+        try:
+            data = self._fda_get(params)
+        except Exception as e:
+            log.warning("Batch FDA search failed, falling back to per-drug lookups: %s", e)
+            return {}
+        
+        # Exact (normalized) generic/brand name matches only: a substring test
+        # would hand "insulin" the "insulin glargine" label. Names without an
+        # exact match are left to the per-drug lookup.
+        by_label_name = {}
+        for label_data in data.get('results', []):
+            openfda = label_data.get('openfda', {})
+            for label_name in openfda.get('generic_name', []) + openfda.get('brand_name', []):
+                by_label_name.setdefault(label_name.lower().strip(), label_data)
         
-        if pharm_class and len(pharm_class) > 0:
-            return ", ".join(pharm_class[:3])
-        return None
+        labels = {}
+        for name in medicine_names:
+            label_data = by_label_name.get(name.lower().strip())
+            if label_data is not None:
+                labels[name] = label_data
+        
+        return labels
+    
+    def _parse_label(self, medicine_name: str, label_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract therapeutic information from one FDA label in a single pass"""
+        therapeutic_info = {'drug_name': medicine_name}
+        
+        for field_name in LABEL_TEXT_FIELDS:
+            field_data = label_data.get(field_name)
+            therapeutic_info[field_name] = "\n\n".join(field_data)[:MAX_FIELD_LEN] if field_data else None
+        
+        # Pharmacologic class from the openfda section (first non-empty field, up to 3 entries)
+        openfda = label_data.get('openfda', {})
+        pharm_class = (
+            openfda.get('pharm_class_epc')
+            or openfda.get('pharm_class_moa')
+            or openfda.get('pharm_class_cs')
+        )
+        therapeutic_info['pharmacologic_class'] = ", ".join(pharm_class[:3]) if pharm_class else None
+        
+        return therapeutic_info
     
     def extract_all_medicines(self, medicine_list: List[str]) -> Dict[str, Any]:
         """Extract therapeutic data for all medicines"""
@@ -360,9 +887,12 @@ class TherapeuticDuplicationChecker:
         
         extracted_data = {}
         
+        # Cache first, then batched FDA searches, then concurrent per-drug fallback
+        fetched = self.extract_therapeutic_data_batch(medicine_list)
+        
         for i, medicine in enumerate(medicine_list, 1):
             print(f"[{i}/{len(medicine_list)}] Extracting: {medicine}...")
-            data = self.extract_therapeutic_data(medicine)
+            data = fetched.get(medicine)
             
             if data:
                 found = []
@@ -377,8 +907,6 @@ class TherapeuticDuplicationChecker:
             else:
                 print(f"  ✗ No FDA data found")
                 extracted_data[medicine] = None
-            
-            time.sleep(0.3)
         
         print("\n" + "=" * 80)
         print(f"Extraction complete: {len(extracted_data)} medicines")
@@ -393,7 +921,7 @@ class TherapeuticDuplicationChecker:
     def identify_duplications(
         self,
         extracted_data: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
+    ) -> List[PairResult]:
         """Compare medicines using simplified 3-category approach"""
         print("\n" + "=" * 80)
         print("PART 2: IDENTIFYING THERAPEUTIC DUPLICATIONS")
@@ -402,51 +930,73 @@ class TherapeuticDuplicationChecker:
         results = []
         
         # Get valid medicines
-        valid_medicines = {name: data for name, data in extracted_data.items() if data is not None}
+        valid_names = [name for name, data in extracted_data.items() if data is not None]
         
-        if len(valid_medicines) < 2:
+        if len(valid_names) < 2:
             print("Less than 2 medicines with valid FDA data to compare.\n")
             return results
         
-        # Compare each pair
-        medicine_pairs = list(combinations(valid_medicines.keys(), 2))
+        # Normalize each medicine once
+        self._features = {
+            name: self._build_features(name, extracted_data[name]) for name in valid_names
+        }
         
-        for med1, med2 in medicine_pairs:
-            print(f"Comparing: {med1} vs {med2}")
-            
-            result = self._categorize_pair(
-                med1, 
-                valid_medicines[med1],
-                med2,
-                valid_medicines[med2]
-            )
+        # Compare each pair (streamed, no materialized pair list)
+        for med1, med2 in combinations(valid_names, 2):
+            result = self._categorize_pair(self._features[med1], self._features[med2])
             
             results.append(result)
             
-            if result['category'] == 'redundant':
+            if not self.verbose:
+                continue
+            
+            print(f"Comparing: {med1} vs {med2}")
+            if result.category == 'redundant':
                 print(f"  ❌ REDUNDANT/DUPLICATE")
-            elif result['category'] == 'overlap':
+            elif result.category == 'overlap':
                 print(f"  ⚠️  OVERLAP WITH RATIONALE")
             else:
                 print(f"  ✓ UNIQUE ROLES")
             print()
         
         print("=" * 80)
-        redundant = len([r for r in results if r['category'] == 'redundant'])
-        overlap = len([r for r in results if r['category'] == 'overlap'])
-        unique = len([r for r in results if r['category'] == 'unique'])
+        redundant = len([r for r in results if r.category == 'redundant'])
+        overlap = len([r for r in results if r.category == 'overlap'])
+        unique = len([r for r in results if r.category == 'unique'])
         print(f"Summary: {redundant} redundant, {overlap} overlap, {unique} unique")
         print("=" * 80 + "\n")
         
         return results
     
+    def _build_features(self, name: str, data: Dict[str, Any]) -> MedicineFeatures:
+        """Normalize a medicine's name, class and FDA text fields"""
+        lower = name.lower().strip()
+        combo_first_mask, combo_second_mask, group1_mask, group2_mask = self._membership_masks(lower)
+        pharm = (data.get('pharmacologic_class') or '').lower()
+        moa = (data.get('mechanism_of_action') or '').lower()
+        pharm_tokens, pharm_words = self._pharm_tokens(pharm)
+        med_class = self._find_drug_class(lower)
+        return MedicineFeatures(
+            name=name,
+            lower=lower,
+            cls=med_class,
+            class_id=self._class_ids.get(med_class, -1),
+            combo_first_mask=combo_first_mask,
+            combo_second_mask=combo_second_mask,
+            group1_mask=group1_mask,
+            group2_mask=group2_mask,
+            pharm=pharm,
+            moa=moa,
+            pharm_tokens=pharm_tokens,
+            pharm_words=pharm_words,
+            moa_tokens=self._moa_tokens(moa)
+        )
+    
     def _categorize_pair(
         self,
-        med1_name: str,
-        med1_data: Dict[str, Any],
-        med2_name: str,
-        med2_data: Dict[str, Any]
-    ) -> Dict[str, Any]:
+        med1: MedicineFeatures,
+        med2: MedicineFeatures
+    ) -> PairResult:
         """
         Categorize medicine pair into 3 categories:
         1. Redundant/Duplicate - Same exact class, high duplication
@@ -454,282 +1004,235 @@ class TherapeuticDuplicationChecker:
         3. Unique - No significant overlap
         """
         
-        med1_lower = med1_name.lower().strip()
-        med2_lower = med2_name.lower().strip()
+        med1_name, med2_name = med1.name, med2.name
         
-        print(f"  DEBUG: Checking {med1_lower} vs {med2_lower}")
+        log.debug("Checking %s vs %s", med1.lower, med2.lower)
         
         # STEP 1: Check if medicines are in same predefined class (STRICT CHECK)
         same_class_name = None
-        med1_class = None
-        med2_class = None
-        
-        # Find which class each medicine belongs to
-        for class_name, drug_list in self.drug_classes.items():
-            for drug in drug_list:
-                if med1_lower in drug.lower() or drug.lower() in med1_lower:
-                    med1_class = class_name
-                    print(f"  DEBUG: {med1_lower} matched to class: {class_name}")
-                if med2_lower in drug.lower() or drug.lower() in med2_lower:
-                    med2_class = class_name
-                    print(f"  DEBUG: {med2_lower} matched to class: {class_name}")
+        med1_class = med1.cls
+        med2_class = med2.cls
+        if med1_class:
+            log.debug("%s matched to class: %s", med1.lower, med1_class)
+        if med2_class:
+            log.debug("%s matched to class: %s", med2.lower, med2_class)
         
         # Check if both diuretics (special handling for diuretic subclasses)
         is_diuretic_combo = False
-        if med1_class and med2_class:
-            if 'diuretic' in med1_class and 'diuretic' in med2_class:
+        if med1.class_id >= 0 and med2.class_id >= 0:
+            if med1.class_id in self._diuretic_class_ids and med2.class_id in self._diuretic_class_ids:
                 is_diuretic_combo = True
                 same_class_name = 'diuretics_combined'
-                print(f"  DEBUG: Both are diuretics! {med1_class} + {med2_class}")
-            elif med1_class == med2_class:
+                log.debug("Both are diuretics! %s + %s", med1_class, med2_class)
+            elif med1.class_id == med2.class_id:
                 same_class_name = med1_class
-                print(f"  DEBUG: Same class detected: {same_class_name}")
+                log.debug("Same class detected: %s", same_class_name)
         
         if same_class_name:
             # Check if this is an appropriate combination
-            is_appropriate = self._is_appropriate_combination(med1_lower, med2_lower)
+            is_appropriate = self._is_appropriate_combination(med1, med2)
             
             if is_appropriate:
                 # Category 2: Overlap with Rationale
-                return {
-                    'medicine_1': med1_name,
-                    'medicine_2': med2_name,
-                    'category': 'overlap',
-                    'reason': f'Both are from {same_class_name.replace("_", " ")} class but combination is clinically recognized',
-                    'recommendation': f'✓ Appropriate combination - verify indication and dosing',
-                    'evidence': f'Class: {same_class_name.replace("_", " ")}'
-                }
+                return PairResult(
+                    medicine_1=med1_name,
+                    medicine_2=med2_name,
+                    category='overlap',
+                    reason=f'Both are from {same_class_name.replace("_", " ")} class but combination is clinically recognized',
+                    recommendation=f'✓ Appropriate combination - verify indication and dosing',
+                    evidence=f'Class: {same_class_name.replace("_", " ")}'
+                )
             else:
                 # Category 1: Redundant/Duplicate
-                return {
-                    'medicine_1': med1_name,
-                    'medicine_2': med2_name,
-                    'category': 'redundant',
-                    'reason': f'Both belong to same drug class: {same_class_name.replace("_", " ")}',
-                    'recommendation': f'⚠️ REDUNDANT - Review if both are necessary. Consider discontinuing one.',
-                    'evidence': f'Class: {same_class_name.replace("_", " ")}'
-                }
+                return PairResult(
+                    medicine_1=med1_name,
+                    medicine_2=med2_name,
+                    category='redundant',
+                    reason=f'Both belong to same drug class: {same_class_name.replace("_", " ")}',
+                    recommendation=f'⚠️ REDUNDANT - Review if both are necessary. Consider discontinuing one.',
+                    evidence=f'Class: {same_class_name.replace("_", " ")}'
+                )
         
         # STEP 2: Check for indication-based overlaps (different classes, same indication)
-        indication_overlap = self._check_indication_overlap(med1_lower, med2_lower)
+        indication_overlap = self._check_indication_overlap(med1, med2)
         if indication_overlap:
-            return {
-                'medicine_1': med1_name,
-                'medicine_2': med2_name,
-                'category': 'overlap',
-                'reason': indication_overlap['reason'],
-                'recommendation': f'⚠️ {indication_overlap["clinical_note"]}',
-                'evidence': 'Different drug classes but overlapping therapeutic indication'
-            }
+            return PairResult(
+                medicine_1=med1_name,
+                medicine_2=med2_name,
+                category='overlap',
+                reason=indication_overlap['reason'],
+                recommendation=f'⚠️ {indication_overlap["clinical_note"]}',
+                evidence='Different drug classes but overlapping therapeutic indication'
+            )
         # STEP 3: Check pharmacologic class from FDA (BROADER CHECK)
-        pharm1 = (med1_data.get('pharmacologic_class') or '').lower()
-        pharm2 = (med2_data.get('pharmacologic_class') or '').lower()
+        pharm1 = med1.pharm
+        pharm2 = med2.pharm
         
-        if pharm1 and pharm2:
+        # Medicines with no class indicators or meaningful words can't overlap
+        if pharm1 and pharm2 and (med1.pharm_tokens | med1.pharm_words) and (med2.pharm_tokens | med2.pharm_words):
             # Check for class similarity
-            class_overlap = self._check_class_overlap(pharm1, pharm2)
+            class_overlap = self._check_class_overlap(med1, med2)
             
             if class_overlap:
                 # Category 2: Overlap with Rationale
-                return {
-                    'medicine_1': med1_name,
-                    'medicine_2': med2_name,
-                    'category': 'overlap',
-                    'reason': f'Similar pharmacologic classes detected',
-                    'recommendation': f'⚠️ Verify clinical rationale for combination. Check guidelines.',
-                    'evidence': f'Class 1: {pharm1[:60]}... | Class 2: {pharm2[:60]}...'
-                }
+                return PairResult(
+                    medicine_1=med1_name,
+                    medicine_2=med2_name,
+                    category='overlap',
+                    reason=f'Similar pharmacologic classes detected',
+                    recommendation=f'⚠️ Verify clinical rationale for combination. Check guidelines.',
+                    evidence=f'Class 1: {pharm1[:60]}... | Class 2: {pharm2[:60]}...'
+                )
         
         # STEP 4: Check Mechanism of Action (MODERATE CHECK)
-        moa1 = (med1_data.get('mechanism_of_action') or '').lower()
-        moa2 = (med2_data.get('mechanism_of_action') or '').lower()
+        moa1 = med1.moa
+        moa2 = med2.moa
         
-        if moa1 and moa2 and len(moa1) > 50 and len(moa2) > 50:
-            moa_similar = self._check_moa_overlap(moa1, moa2)
+        # Only medicines that name a specific mechanism can match
+        if med1.moa_tokens and med2.moa_tokens and len(moa1) > 50 and len(moa2) > 50:
+            moa_similar = self._check_moa_overlap(med1, med2)
             
             if moa_similar:
                 # Category 2: Overlap with Rationale
-                return {
-                    'medicine_1': med1_name,
-                    'medicine_2': med2_name,
-                    'category': 'overlap',
-                    'reason': f'Similar mechanisms of action detected',
-                    'recommendation': f'ℹ️ Review mechanism overlap. May be appropriate depending on indication.',
-                    'evidence': f'Both have similar molecular mechanisms'
-                }
+                return PairResult(
+                    medicine_1=med1_name,
+                    medicine_2=med2_name,
+                    category='overlap',
+                    reason=f'Similar mechanisms of action detected',
+                    recommendation=f'ℹ️ Review mechanism overlap. May be appropriate depending on indication.',
+                    evidence=f'Both have similar molecular mechanisms'
+                )
         
         # STEP 5: Default to Unique (no significant overlap found)
-        return {
-            'medicine_1': med1_name,
-            'medicine_2': med2_name,
-            'category': 'unique',
-            'reason': 'No significant overlap detected',
-            'recommendation': '✓ Medications appear to have unique therapeutic roles',
-            'evidence': 'Different classes and mechanisms'
-        }
+        return PairResult(
+            medicine_1=med1_name,
+            medicine_2=med2_name,
+            category='unique',
+            reason='No significant overlap detected',
+            recommendation='✓ Medications appear to have unique therapeutic roles',
+            evidence='Different classes and mechanisms'
+        )
     
-    def _is_appropriate_combination(self, med1: str, med2: str) -> bool:
-        """Check if combination is in appropriate list"""
-        for combo in self.appropriate_combinations:
-            if (combo[0] in med1 and combo[1] in med2) or \
-               (combo[1] in med1 and combo[0] in med2):
-                return True
-        return False
-    
-    def _check_indication_overlap(self, med1: str, med2: str) -> Optional[Dict[str, str]]:
-        """Check if medicines have overlapping therapeutic indications (different classes)"""
-        for overlap in self.indication_overlaps:
-            group1_match = any(drug in med1 or med1 in drug for drug in overlap['group1'])
-            group2_match = any(drug in med2 or med2 in drug for drug in overlap['group2'])
-            
-            # Check both directions (group1 vs group2)
-            if (group1_match and group2_match):
-                return {
-                    'reason': overlap['reason'],
-                    'clinical_note': overlap['clinical_note']
-                }
-            
-            # Also check reverse direction (group2 vs group1)
-            group1_match_rev = any(drug in med2 or med2 in drug for drug in overlap['group1'])
-            group2_match_rev = any(drug in med1 or med1 in drug for drug in overlap['group2'])
-            
-            if (group1_match_rev and group2_match_rev):
-                return {
-                    'reason': overlap['reason'],
-                    'clinical_note': overlap['clinical_note']
-                }
-            
-            # Special case: Check if BOTH medicines are in the SAME group (redundancy)
-            # This handles cases like ICS + ICS, LABA + LABA
-            both_in_group1 = (any(drug in med1 or med1 in drug for drug in overlap['group1']) and 
-                             any(drug in med2 or med2 in drug for drug in overlap['group1']))
-            both_in_group2 = (any(drug in med1 or med1 in drug for drug in overlap['group2']) and 
-                             any(drug in med2 or med2 in drug for drug in overlap['group2']))
-            
-            if both_in_group1 or both_in_group2:
-                return {
-                    'reason': overlap['reason'],
-                    'clinical_note': overlap['clinical_note']
-                }
-        
-        return None
-    
-    def _check_class_overlap(self, class1: str, class2: str) -> bool:
-        """Check if pharmacologic classes overlap - STRICT matching"""
-        
-        # Remove FDA classification codes that appear in all drugs
-        class1_clean = class1.replace('[epc]', '').replace('[moa]', '').replace('[cs]', '').strip()
-        class2_clean = class2.replace('[epc]', '').replace('[moa]', '').replace('[cs]', '').strip()
-        
-        # Key terms that indicate same class (specific drug classes only)
-        class_indicators = [
-            'statin', 'hmg-coa reductase inhibitor',
-            'nsaid', 'nonsteroidal anti-inflammatory',
-            'beta blocker', 'beta-adrenergic blocker',
-            'ace inhibitor', 'angiotensin converting enzyme inhibitor',
-            'arb', 'angiotensin receptor blocker', 'angiotensin ii receptor antagonist',
-            'calcium channel blocker', 'calcium channel antagonist',
-            'proton pump inhibitor',
-            'h2 receptor antagonist', 'histamine h2 receptor antagonist',
-            'ssri', 'selective serotonin reuptake inhibitor',
-            'snri', 'serotonin norepinephrine reuptake inhibitor',
-            'loop diuretic',
-            'thiazide diuretic',
-            'potassium-sparing diuretic', 'aldosterone antagonist',
-            'sulfonylurea',
-            'dpp-4 inhibitor',
-            'sglt2 inhibitor',
-            'glp-1 agonist', 'glucagon-like peptide-1 receptor agonist',
-            'benzodiazepine',
-            'opioid agonist',
-            'direct oral anticoagulant', 'factor xa inhibitor', 'thrombin inhibitor',
-            'penicillin',
-            'cephalosporin',
-            'macrolide',
-            'fluoroquinolone',
-        ]
+    def _match_tokens(self, med: str) -> Tuple[frozenset, frozenset]:
+        """
+        Match a lowercased medicine name against all known drugs
+        Returns (drugs contained in the name, drugs related in either direction)
+        """
+        cached = self._token_cache.get(med)
+        if cached is not None:
+            return cached
         
-        # Check if both contain the SAME specific class indicator
-        for indicator in class_indicators:
-            if indicator in class1_clean.lower() and indicator in class2_clean.lower():
-                return True
+        contained = self._drug_matcher.find(med)
+        related = contained | {drug for drug in self._known_drugs if med in drug}
         
-        # Check for substantial meaningful word overlap (at least 3 words, each >5 chars)
-        class1_words = set(class1_clean.lower().split())
-        class2_words = set(class2_clean.lower().split())
+        self._token_cache[med] = (contained, related)
+        return contained, related
+    
+    def _membership_masks(self, med: str) -> Tuple[int, int, int, int]:
+        """Combination and overlap-group bitmasks for a lowercased name, computed once per name"""
+        masks = self._mask_cache.get(med)
+        if masks is None:
+            contained, related = self._match_tokens(med)
+            masks = self._combo_masks(contained) + self._group_masks(related)
+            self._mask_cache[med] = masks
+        return masks
+    
+    def _find_drug_class(self, med: str) -> Optional[str]:
+        """Return the predefined class for a lowercased medicine name"""
+        if med in self.drug_to_class:
+            return self.drug_to_class[med]
+        return self._class_for_tokens(self._match_tokens(med)[1])
+    
+    def _class_for_tokens(self, related: frozenset) -> Optional[str]:
+        """Class of the last-declared drug among the related tokens"""
+        ranked = [self._drug_class_rank[drug] for drug in related if drug in self._drug_class_rank]
+        return max(ranked)[1] if ranked else None
+    
+    def _combo_masks(self, contained: frozenset) -> Tuple[int, int]:
+        """Bitmasks of the appropriate combinations whose first/second drug is in the name"""
+        first_mask = second_mask = 0
+        for bit, (drug1, drug2) in enumerate(self.appropriate_combinations):
+            if drug1 in contained:
+                first_mask |= 1 << bit
+            if drug2 in contained:
+                second_mask |= 1 << bit
+        return first_mask, second_mask
+    
+    def _group_masks(self, related: frozenset) -> Tuple[int, int]:
+        """Bitmasks of the indication overlap rows whose group1/group2 contain the medicine"""
+        group1_mask = group2_mask = 0
+        for bit, (group1, group2, _) in enumerate(self._overlap_groups):
+            if not group1.isdisjoint(related):
+                group1_mask |= 1 << bit
+            if group2 is not None and not group2.isdisjoint(related):
+                group2_mask |= 1 << bit
+        return group1_mask, group2_mask
+    
+    def _is_appropriate_combination(self, med1: MedicineFeatures, med2: MedicineFeatures) -> bool:
+        """Check if combination is in appropriate list (either order)"""
+        return bool(
+            (med1.combo_first_mask & med2.combo_second_mask)
+            | (med1.combo_second_mask & med2.combo_first_mask)
+        )
+    
+    def _check_indication_overlap(self, med1: MedicineFeatures, med2: MedicineFeatures) -> Optional[Dict[str, str]]:
+        """Check if medicines have overlapping therapeutic indications (different classes)"""
+        # Rows where the medicines sit in opposite groups (either direction) or
+        # both in the same group; same-group rows only ever set group1 bits
+        matched = (
+            (med1.group1_mask & med2.group2_mask)
+            | (med1.group2_mask & med2.group1_mask)
+            | (med1.group1_mask & med2.group1_mask)
+            | (med1.group2_mask & med2.group2_mask)
+        )
+        if not matched:
+            return None
         
-        # Filter out common/generic terms
-        stopwords = {
-            'and', 'or', 'the', 'a', 'an', 'in', 'of', 'for', 'to', 'with', 'by', 'as', 'is', 'at',
-            'agent', 'drug', 'class', 'inhibitor', 'antagonist', 'agonist', 'receptor', 'blocker'
+        # Rows are checked in declaration order; the first (lowest bit) match wins
+        overlap = self._overlap_groups[(matched & -matched).bit_length() - 1][2]
+        return {
+            'reason': overlap['reason'],
+            'clinical_note': overlap['clinical_note']
         }
-        
-        meaningful1 = {w for w in class1_words if len(w) > 5} - stopwords
-        meaningful2 = {w for w in class2_words if len(w) > 5} - stopwords
-        common = meaningful1.intersection(meaningful2)
-        
-        # Require at least 3 meaningful common words for a match
-        return len(common) >= 3
     
-    def _check_moa_overlap(self, moa1: str, moa2: str) -> bool:
-        """Check if mechanisms overlap - STRICT matching for specific mechanisms"""
-        
-        # Specific mechanism patterns (not just generic keywords)
-        specific_mechanisms = [
-            # Enzyme inhibition (specific enzymes)
-            'hmg-coa reductase',
-            'ace inhibit',  # angiotensin converting enzyme
-            'cox-1',
-            'cox-2',
-            'cyclooxygenase',
-            'proton pump',
-            'dpp-4',
-            'mao inhibit',
-            'phosphodiesterase',
-            'aromatase',
-            
-            # Receptor interactions (specific receptors)
-            'beta-1 adrenergic',
-            'beta-2 adrenergic',
-            'beta adrenergic receptor',
-            'alpha-1 adrenergic',
-            'alpha-2 adrenergic',
-            'serotonin reuptake',
-            'norepinephrine reuptake',
-            'dopamine reuptake',
-            'angiotensin ii receptor',
-            'histamine h1 receptor',
-            'histamine h2 receptor',
-            'opioid receptor',
-            'gaba receptor',
-            'nmda receptor',
-            
-            # Ion channels
-            'calcium channel',
-            'sodium channel',
-            'potassium channel',
-            
-            # Transport/reuptake
-            'serotonin transporter',
-            'norepinephrine transporter',
-            'dopamine transporter',
-            
-            # Other specific mechanisms
-            'dihydrofolate reductase',
-            'thrombin inhibit',
-            'factor xa inhibit',
-            'platelet aggregation',
-        ]
+    def _pharm_tokens(self, pharm: str) -> Tuple[int, int]:
+        """Class indicators and meaningful words (>5 chars) in a lowercased pharmacologic class"""
+        key = ('pharm', pharm)
+        cached = self._norm_cache.get(key)
+        if cached is not None:
+            return cached
         
-        # Find specific mechanism matches
-        moa1_specific = [m for m in specific_mechanisms if m in moa1]
-        moa2_specific = [m for m in specific_mechanisms if m in moa2]
+        # Remove FDA classification codes that appear in all drugs
+        pharm_clean = FDA_CLASS_CODE_RE.sub('', pharm).strip()
         
-        # Check for common SPECIFIC mechanisms
-        common_specific = set(moa1_specific).intersection(set(moa2_specific))
+        indicators = self._class_matcher.find_mask(pharm_clean)
+        words = 0
+        for w in set(pharm_clean.split()) - self.class_stopwords:
+            if len(w) > 5:
+                words |= self._word_bits.setdefault(w, 1 << len(self._word_bits))
+        self._norm_cache[key] = indicators, words
+        return indicators, words
+    
+    def _moa_tokens(self, moa: str) -> int:
+        """Specific mechanisms named in a lowercased mechanism of action"""
+        key = ('moa', moa)
+        mask = self._norm_cache.get(key)
+        if mask is None:
+            mask = self._norm_cache[key] = self._mechanism_matcher.find_mask(moa)
+        return mask
+    
+    def _check_class_overlap(self, med1: MedicineFeatures, med2: MedicineFeatures) -> bool:
+        """Check if pharmacologic classes overlap - STRICT matching"""
+        # Both contain the SAME specific class indicator
+        if med1.pharm_tokens & med2.pharm_tokens:
+            return True
         
-        # Require at least 1 SPECIFIC mechanism match (not just generic keywords)
-        return len(common_specific) >= 1
+        # Require at least 3 meaningful common words for a match
+        return (med1.pharm_words & med2.pharm_words).bit_count() >= 3
+    
+    def _check_moa_overlap(self, med1: MedicineFeatures, med2: MedicineFeatures) -> bool:
+        """Check if mechanisms overlap - at least 1 SPECIFIC mechanism in common"""
+        return bool(med1.moa_tokens & med2.moa_tokens)
     
     def _check_critical_monotherapy(self, patient_data: Dict[str, Any]) -> List[Dict[str, str]]:
         """
@@ -744,27 +1247,24 @@ class TherapeuticDuplicationChecker:
         condition = patient_data.get('patient', {}).get('condition', '').lower()
         patient_info = f"{diagnosis} {condition}"
         
-        # Check SABA-only for asthma (CRITICAL GINA 2024)
-        saba_warning = self.critical_monotherapy_warnings['asthma_saba_only']
-        
-        # Check if patient has asthma
-        has_asthma = any(keyword in patient_info for keyword in saba_warning['diagnosis_keywords'])
+        # Drugs related to each medicine (substring either way), memoized per name
+        related = set()
+        for med in medicines:
+            related |= self._match_tokens(med)[1]
         
-        if has_asthma:
-            # Check if patient is on any SABA
-            has_saba = any(saba in med or med in saba for med in medicines for saba in saba_warning['drugs'])
+        # e.g. SABA-only for asthma (CRITICAL GINA 2024)
+        for diagnosis_re, drugs, required_with, warning in self._monotherapy_rules:
+            if diagnosis_re is None or not diagnosis_re.search(patient_info):
+                continue
             
-            # Check if patient has any ICS (controller)
-            has_ics = any(ics in med or med in ics for med in medicines for ics in saba_warning['required_with'])
-            
-            # CRITICAL: SABA without ICS
-            if has_saba and not has_ics:
+            # CRITICAL: on a listed drug without any required companion (e.g. SABA without ICS)
+            if not drugs.isdisjoint(related) and required_with.isdisjoint(related):
                 warnings.append({
                     'severity': 'CRITICAL',
-                    'type': 'SABA_ONLY_ASTHMA',
-                    'message': saba_warning['warning'],
-                    'guideline': 'GINA 2024',
-                    'action_required': 'Add ICS-containing controller therapy immediately'
+                    'type': warning['type'],
+                    'message': warning['warning'],
+                    'guideline': warning['guideline'],
+                    'action_required': warning['action_required']
                 })
         
         return warnings
@@ -776,16 +1276,16 @@ class TherapeuticDuplicationChecker:
     def generate_report(
         self,
         patient_data: Dict[str, Any],
-        results: List[Dict[str, Any]]
+        results: List[PairResult]
     ) -> Dict[str, Any]:
         """Generate simplified report"""
         
         total_medicines = len(patient_data.get('prescription', []))
         
         # Categorize
-        redundant = [r for r in results if r['category'] == 'redundant']
-        overlap = [r for r in results if r['category'] == 'overlap']
-        unique = [r for r in results if r['category'] == 'unique']
+        redundant = [asdict(r) for r in results if r.category == 'redundant']
+        overlap = [asdict(r) for r in results if r.category == 'overlap']
+        unique = [asdict(r) for r in results if r.category == 'unique']
         
         # Summary
         if redundant:
@@ -813,45 +1313,51 @@ class TherapeuticDuplicationChecker:
         return report
     
     def print_report(self, report: Dict[str, Any]):
-        """Print simplified report"""
-        print("\n" + "=" * 80)
-        print("THERAPEUTIC DUPLICATION REPORT")
-        print("=" * 80)
-        print(f"\nPatient: {report['patient']['age']}y {report['patient']['gender']}")
-        print(f"Diagnosis: {report['patient']['diagnosis']}")
-        print(f"Condition: {report['patient']['condition']}")
-        print(f"Total Medications: {report['total_medications_reviewed']}")
-        
-        print(f"\n{report['summary']}")
-        print("=" * 80)
+        """Print simplified report (one write to stdout)"""
+        sys.stdout.write(self._format_report(report))
+    
+    def _format_report(self, report: Dict[str, Any]) -> str:
+        """Render the simplified report as text"""
+        lines = [
+            "\n" + "=" * 80,
+            "THERAPEUTIC DUPLICATION REPORT",
+            "=" * 80,
+            f"\nPatient: {report['patient']['age']}y {report['patient']['gender']}",
+            f"Diagnosis: {report['patient']['diagnosis']}",
+            f"Condition: {report['patient']['condition']}",
+            f"Total Medications: {report['total_medications_reviewed']}",
+            f"\n{report['summary']}",
+            "=" * 80,
+        ]
         
         # Category 1: Redundant/Duplicate
         if report['redundant_duplicate']:
-            print("\n❌ CATEGORY 1: REDUNDANT/DUPLICATE PRESCRIPTION\n")
+            lines.append("\n❌ CATEGORY 1: REDUNDANT/DUPLICATE PRESCRIPTION\n")
             for item in report['redundant_duplicate']:
-                print(f"  ❌ {item['medicine_1']} + {item['medicine_2']}")
-                print(f"     Reason: {item['reason']}")
-                print(f"     Evidence: {item['evidence']}")
-                print(f"     {item['recommendation']}")
-                print()
+                lines.append(f"  ❌ {item['medicine_1']} + {item['medicine_2']}")
+                lines.append(f"     Reason: {item['reason']}")
+                lines.append(f"     Evidence: {item['evidence']}")
+                lines.append(f"     {item['recommendation']}")
+                lines.append("")
         
         # Category 2: Overlap with Rationale
         if report['overlap_with_rationale']:
-            print("\n⚠️  CATEGORY 2: SOME OVERLAP BUT WITH RATIONALE\n")
+            lines.append("\n⚠️  CATEGORY 2: SOME OVERLAP BUT WITH RATIONALE\n")
             for item in report['overlap_with_rationale']:
-                print(f"  ⚠️  {item['medicine_1']} + {item['medicine_2']}")
-                print(f"     Reason: {item['reason']}")
-                print(f"     {item['recommendation']}")
-                print()
+                lines.append(f"  ⚠️  {item['medicine_1']} + {item['medicine_2']}")
+                lines.append(f"     Reason: {item['reason']}")
+                lines.append(f"     {item['recommendation']}")
+                lines.append("")
         
         # Category 3: Unique
         if report['unique_no_overlap']:
-            print("\n✓ CATEGORY 3: UNIQUE ROLE, NO OVERLAP\n")
+            lines.append("\n✓ CATEGORY 3: UNIQUE ROLE, NO OVERLAP\n")
             for item in report['unique_no_overlap']:
-                print(f"  ✓ {item['medicine_1']} + {item['medicine_2']}")
-                print(f"     {item['recommendation']}")
+                lines.append(f"  ✓ {item['medicine_1']} + {item['medicine_2']}")
+                lines.append(f"     {item['recommendation']}")
         
-        print("\n" + "=" * 80 + "\n")
+        lines.append("\n" + "=" * 80 + "\n")
+        return "\n".join(lines) + "\n"
     
     # ============================================================================
     # MAIN WORKFLOW
@@ -870,6 +1376,15 @@ class TherapeuticDuplicationChecker:
                 'unique_no_overlap': []
             }
         
+        # Name matches and normalized label text are only reused within one
+        # patient's analysis; clearing keeps a long-lived analyzer bounded
+        self._token_cache.clear()
+        self._mask_cache.clear()
+        self._norm_cache.clear()
+        # Word bits only live in _norm_cache entries and this call's features,
+        # so they can be renumbered from zero
+        self._word_bits.clear()
+        
         # Extract data
         extracted_data = self.extract_all_medicines(medicines)
         
@@ -884,6 +1399,9 @@ class TherapeuticDuplicationChecker:
 
 def main():
     """Main execution"""
+    # Set LOG_LEVEL=DEBUG to see per-pair matching details
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
+    
     print("\n" + "=" * 80)
     print("THERAPEUTIC DUPLICATION CHECKER - SIMPLIFIED 3-CATEGORY APPROACH")
     print("Category 1: Redundant/Duplicate | Category 2: Overlap | Category 3: Unique")
@@ -911,8 +1429,12 @@ def main():
     
     # Save report
     output_file = f"therapeutic_duplication_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(output_file, 'w') as f:
-        json.dump(report, f, indent=2)
+    if ORJSON_AVAILABLE:
+        payload = orjson.dumps(report, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(report, indent=2).encode('utf-8')
+    with open(output_file, 'wb') as f:
+        f.write(payload)
     
     print(f"Detailed report saved to: {output_file}\n")
 
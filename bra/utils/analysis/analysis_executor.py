@@ -6,10 +6,17 @@ UPDATED to support contraindication detection with full patient data
 
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from utils.analysis.analysis_worker import analyze_drug_diagnosis
+from utils.file_loader import FileWriter
+import os
 import time
 
 
-def execute_parallel_analysis(tasks, patient, email, condition_duplication_results, full_input_data=None, max_workers=4):
+# Tasks are network-bound (Bedrock, openFDA, PubMed), so the worker cap tracks
+# what the upstream services tolerate, not the host's CPU count
+ANALYSIS_MAX_WORKERS = int(os.getenv("ANALYSIS_MAX_WORKERS", "10"))
+
+
+def execute_parallel_analysis(tasks, patient, email, condition_duplication_results, full_input_data=None, max_workers=None):
     """
     Execute parallel analysis for all drug-diagnosis tasks
     
@@ -19,7 +26,7 @@ def execute_parallel_analysis(tasks, patient, email, condition_duplication_resul
         email: Email for PubMed queries
         condition_duplication_results: Dict mapping diagnosis -> duplication result
         full_input_data: Full input data including currentDiagnoses, chiefComplaints (NEW)
-        max_workers: Number of parallel workers
+        max_workers: Number of parallel workers (default: one per task, up to ANALYSIS_MAX_WORKERS)
     
     Returns:
         Tuple of (results list, elapsed time)
@@ -27,7 +34,12 @@ def execute_parallel_analysis(tasks, patient, email, condition_duplication_resul
     results = []
     start = time.time()
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    if max_workers is None:
+        max_workers = max(1, min(len(tasks), ANALYSIS_MAX_WORKERS))
+
+    # Result files are handed to one writer thread; leaving the block waits
+    # until every file is on disk
+    with FileWriter() as writer, ThreadPoolExecutor(max_workers=max_workers) as executor:
         futures = []
         
         for thread_id, task in enumerate(tasks, start=1):
@@ -47,7 +59,8 @@ def execute_parallel_analysis(tasks, patient, email, condition_duplication_resul
                     thread_id,
                     condition_duplication_results.get(diagnosis),
                     has_duplication,
-                    full_input_data  # Pass full input data for contraindication checking
+                    full_input_data,  # Pass full input data for contraindication checking
+                    writer
                 )
             )
 
@@ -9,8 +9,115 @@ from mme.mme_checker import start as fda_start
 from pubmed.searcher import start as pubmed_start
 from contraindication.app import start as contra_start  # Use fixed version
 from scoring.scoring_sytem import ScoringSystem
+from scoring.benefit_factor import get_consequences_data, get_mitigation_feasibility_data
 from alternatives.fda_finder import FDAAlternativesFinder
+from utils.disk_cache import DiskCache, cache_key
+from utils.shared_cache import SharedResultCache
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List
+import functools
+import importlib.util
+import logging
+import os
+
+
+def _module_available(name: str) -> bool:
+    """Whether an optional subsystem module is installed (without importing it)"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ModuleNotFoundError:  # its parent package is missing
+        return False
+
+
+# Optional subsystems are probed once at load; a missing module disables its
+# stage, while a broken one fails loudly at import
+_HAS_RRM = _module_available("rrm.rrm")
+_HAS_CONSEQUENCES = _module_available("consequences.consequences")
+_HAS_RMF = _module_available("risk_mitigation_feasability.rmf")
+
+if _HAS_RRM:
+    from rrm.rrm import start as rrm_start
+else:
+    rrm_start = None
+
+if _HAS_CONSEQUENCES:
+    from consequences.consequences import start as cons_start
+else:
+    cons_start = None
+
+if _HAS_RMF:
+    from risk_mitigation_feasability.rmf import start as rmf_start
+else:
+    rmf_start = None
+
+
+log = logging.getLogger(__name__)
+
+# Shared pool for the network-bound analysis stages of every task. Stage jobs
+# never submit work to this pool themselves, so it cannot deadlock.
+STAGE_MAX_WORKERS = 16
+_stage_executor = ThreadPoolExecutor(max_workers=STAGE_MAX_WORKERS, thread_name_prefix="analysis-stage")
+
+# Alternatives are analyzed concurrently on their own pool; their jobs block
+# on the stage pool, so they must never share it
+ALTERNATIVE_MAX_WORKERS = 8
+_alternative_executor = ThreadPoolExecutor(
+    max_workers=ALTERNATIVE_MAX_WORKERS, thread_name_prefix="analysis-alt"
+)
+
+# Alternatives for a drug and diagnosis are shared by every task asking for them
+ALTERNATIVES_TOP_N = 3
+ALTERNATIVES_CACHE_TTL = 86400  # seconds
+_alternatives_cache = SharedResultCache(maxsize=512, ttl=ALTERNATIVES_CACHE_TTL)
+
+# Characters of a diagnosis that cannot appear in a result filename
+_FILENAME_SAFE = str.maketrans(" /", "__")
+
+# Completed analyses keyed by a hash of all their inputs, so repeat runs for
+# the same patient, drug and diagnosis skip every network stage; entries also
+# keep the patient-level stage results, which a hit hands to the alternatives.
+# Off by default: a hit serves clinical output as it was when first computed,
+# so enable it only where results that old are acceptable
+ANALYSIS_CACHE_VERSION = 2
+ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", "0"))  # seconds, 0 disables
+_result_cache = DiskCache("analysis_results", ttl=ANALYSIS_CACHE_TTL)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_alternatives_finder() -> FDAAlternativesFinder:
+    """
+    One finder (and HTTP session) for every task, built on first use so
+    importing the worker does not open a session
+    """
+    return FDAAlternativesFinder()
+
+
+def _run_optional_stage(start, label: str, tag: str, default, **kwargs):
+    """
+    Run an optional subsystem's start(), falling back to default when the
+    subsystem is not installed or fails, so it never fails the analysis
+    
+    Returns:
+        (stage result, whether the stage failed and fell back to default)
+    """
+    if start is None:
+        log.warning("%s ⚠️  %s not available", tag, label)
+        return default, False
+
+    try:
+        log.debug("%s → %s analysis...", tag, label)
+        return start(**kwargs), False
+    except Exception as e:
+        log.warning("%s ⚠️  %s failed: %s", tag, label, e)
+        return default, True
+
+
+def _record_shared_scores(scoring: ScoringSystem, conn_data, rmf_data):
+    """Record the scores of reused consequences/RMF results on another ScoringSystem"""
+    if conn_data and conn_data.get("consequences_score") is not None:
+        get_consequences_data(conn_data.get("consequences.json", {}), scoring_system=scoring)
+    if rmf_data and rmf_data.get("mitigation_score") is not None:
+        get_mitigation_feasibility_data(rmf_data, scoring_system=scoring)
 
 
 def analyze_single_drug(
@@ -22,10 +129,36 @@ def analyze_single_drug(
     duplication_result: dict | None = None,
     has_duplication_check: bool = False,
     is_alternative: bool = False,
-    full_patient_data: dict = None
+    full_patient_data: dict = None,
+    writer=None,
+    shared_stages: dict | None = None
 ) -> Dict:
     """
     Perform complete analysis for a single drug-diagnosis pair
+    (see _analyze_drug; only the result dictionary is returned)
+    """
+    result, _ = _analyze_drug(
+        drug, diagnosis, patient, email, thread_id, duplication_result,
+        has_duplication_check, is_alternative, full_patient_data, writer, shared_stages
+    )
+    return result
+
+
+def _analyze_drug(
+    drug: str,
+    diagnosis: str,
+    patient: dict,
+    email: str,
+    thread_id: int,
+    duplication_result: dict | None = None,
+    has_duplication_check: bool = False,
+    is_alternative: bool = False,
+    full_patient_data: dict = None,
+    writer=None,
+    shared_stages: dict | None = None
+) -> tuple[Dict, dict | None]:
+    """
+    Perform complete analysis for a single drug-diagnosis pair
     
     Args:
         drug: Medication name
@@ -37,49 +170,80 @@ def analyze_single_drug(
         has_duplication_check: Whether duplication was checked
         is_alternative: Whether this is an alternative medication
         full_patient_data: Full patient data including currentDiagnoses, chiefComplaints
+        writer: Optional FileWriter that writes the result file in the background
+        shared_stages: Patient-level RRM/consequences/RMF results to reuse
+            instead of running those stages (read only)
         
     Returns:
-        Complete analysis result dictionary
+        (complete analysis result dictionary, patient-level stage results
+        to hand to other analyses of the same patient, or None)
     """
     prefix = "ALT" if is_alternative else "Thread"
-    print(f"\n[{prefix} {thread_id}] {'='*60}")
-    print(f"[{prefix} {thread_id}] Drug: {drug}")
-    print(f"[{prefix} {thread_id}] Diagnosis: {diagnosis}")
-    print(f"[{prefix} {thread_id}] {'='*60}")
+    tag = f"[{prefix} {thread_id}]"
+    log.info("%s Drug: %s | Diagnosis: %s", tag, drug, diagnosis)
 
     # Create result filename - mark alternatives clearly
-    if is_alternative:
-        result_file = f"results/ALT_{drug}_{diagnosis.replace(' ', '_').replace('/', '_')}_result.json"
-    else:
-        result_file = f"results/{drug}_{diagnosis.replace(' ', '_').replace('/', '_')}_result.json"
+    file_prefix = "ALT_" if is_alternative else ""
+    result_file = f"results/{file_prefix}{drug}_{diagnosis.translate(_FILENAME_SAFE)}_result.json"
     
     scoring = ScoringSystem(result_file)
 
+    result_key = cache_key(
+        ANALYSIS_CACHE_VERSION, drug, diagnosis, patient, full_patient_data,
+        duplication_result, has_duplication_check, is_alternative
+    )
+    cached = _result_cache.get(result_key)
+    if cached is not None:
+        result = cached["result"]
+        result["output_file"] = scoring.save_to_json(writer, cached["payload"].encode("utf-8"))
+        log.info("%s ✓ Cached - BRR: %s (%s)", tag, result['brr'], result['brr_interpretation'])
+        return result, cached["shared_stages"]
+
     try:
+        # Stages 1-4, the ADR review and the consequences analysis only call
+        # external services and do not depend on each other, so they run
+        # concurrently; wall time is the slowest stage
+        contra_patient_data = full_patient_data if full_patient_data else {"patient": patient}
+
         # 1. Regulatory indication (Benefit Factor)
-        print(f"[{prefix} {thread_id}] → Regulatory analysis...")
-        regulatory_result = bedrock_start(drug, diagnosis, scoring)
+        log.debug("%s → Regulatory analysis...", tag)
+        regulatory_future = _stage_executor.submit(bedrock_start, drug, diagnosis, scoring)
 
         # 2. Market experience
-        print(f"[{prefix} {thread_id}] → Market experience analysis...")
-        fda_result = fda_start(drug, scoring)
+        log.debug("%s → Market experience analysis...", tag)
+        fda_future = _stage_executor.submit(fda_start, drug, scoring)
 
         # 3. PubMed evidence
-        print(f"[{prefix} {thread_id}] → PubMed analysis...")
-        pubmed_result = pubmed_start(drug, diagnosis, email, scoring)
-        rct_count = pubmed_result.get("rct_count", 0)
+        log.debug("%s → PubMed analysis...", tag)
+        pubmed_future = _stage_executor.submit(pubmed_start, drug, diagnosis, email, scoring)
 
         # 4. Contraindications - FIXED: Pass diagnosis to exclude it from contraindication check
-        print(f"[{prefix} {thread_id}] → Contraindication analysis...")
-        contra_patient_data = full_patient_data if full_patient_data else {"patient": patient}
-        contra_res = contra_start(drug, diagnosis, contra_patient_data, scoring)
+        log.debug("%s → Contraindication analysis...", tag)
+        contra_future = _stage_executor.submit(contra_start, drug, diagnosis, contra_patient_data, scoring)
+
+        # 6. ADRs Analysis
+        log.debug("%s → ADRs analysis...", tag)
+        adrs_future = _stage_executor.submit(adrs_start, drug, scoring)
+
+        # 7. Consequences (reads the patient handoff file only)
+        if shared_stages is None:
+            cons_future = _stage_executor.submit(
+                _run_optional_stage, cons_start, "Consequences", tag, {},
+                scoring_system=scoring
+            )
+
+        regulatory_result = regulatory_future.result()
+        fda_result = fda_future.result()
+        pubmed_result = pubmed_future.result()
+        rct_count = pubmed_result.get("rct_count", 0)
+        contra_res = contra_future.result()
         has_contraindication = contra_res.get("has_contraindication", False)
         
-        print(f"[{prefix} {thread_id}] → Contraindication detected: {has_contraindication}")
+        log.debug("%s → Contraindication detected: %s", tag, has_contraindication)
 
         # 5. Therapeutic Duplication
         if has_duplication_check and duplication_result:
-            print(f"[{prefix} {thread_id}] → Adding therapeutic duplication result")
+            log.debug("%s → Adding therapeutic duplication result", tag)
             scoring.add_analysis("therapeutic_duplication", duplication_result)
         else:
             scoring.add_analysis(
@@ -90,73 +254,70 @@ def analyze_single_drug(
                 }
             )
 
-        # 6. ADRs Analysis
-        print(f"[{prefix} {thread_id}] → ADRs analysis...")
-        adrs_res = adrs_start(drug, scoring)
+        adrs_res = adrs_future.result()
         has_lt_adrs = adrs_res.get("has_life_threatening_adrs", False)
         has_serious_adrs = adrs_res.get("has_serious_adrs", False)
         has_drug_interactions = adrs_res.get("has_drug_interactions", False)
 
-# 7. RRM and Consequences
-        try:
-            from rrm.rrm import start as rrm_start
-            print(f"[{prefix} {thread_id}] → RRM analysis...")
-            # RRM table generation (used for clinical reporting)
-            rrm_table = rrm_start()
-        except Exception as e:
-            print(f"[{prefix} {thread_id}] ⚠️  RRM not available: {e}")
-            rrm_table = []
-
-        try:
-            from consequences.consequences import start as cons_start
-            print(f"[{prefix} {thread_id}] → Consequences analysis...")
-            # NEW: Passing 'scoring' triggers internal get_consequences_data()
-            conn_data = cons_start(scoring_system=scoring)
-        except Exception as e:
-            print(f"[{prefix} {thread_id}] ⚠️  Consequences not available: {e}")
-            conn_data = {}
+        if shared_stages is not None:
+            # RRM, consequences and RMF only depend on the patient, so an
+            # alternative reuses the primary drug's results and scores
+            log.debug("%s → Reusing RRM, consequences and mitigation results", tag)
+            rrm_table = shared_stages["rrm"]
+            conn_data = shared_stages["consequences"]
+            rmf_data = shared_stages["rmf"]
+            degraded = shared_stages.get("degraded", False)
+            _record_shared_scores(scoring, conn_data, rmf_data)
+        else:
+            # 7-8. RRM table and Risk Mitigation Feasibility (Factor 3.4) both read
+            # the ADR output file, so they start once the ADR review has written it
+            rrm_future = _stage_executor.submit(
+                _run_optional_stage, rrm_start, "RRM", tag, []
+            )
+            rmf_future = _stage_executor.submit(
+                _run_optional_stage, rmf_start, "Mitigation feasibility", tag, {},
+                scoring_system=scoring
+            )
 
-        # 8. Risk Mitigation Feasibility (Factor 3.4)
-        try:
-            from risk_mitigation_feasability.rmf import start as rmf_start
-            print(f"[{prefix} {thread_id}] → Mitigation feasibility analysis...")
-            # NEW: Passing 'scoring' triggers internal get_mitigation_feasibility_data()
-            rmf_data = rmf_start(scoring_system=scoring)
-        except Exception as e:
-            print(f"[{prefix} {thread_id}] ⚠️  Mitigation analysis not available: {e}")
-            rmf_data = {}
+            conn_data, cons_failed = cons_future.result()
+            rrm_table, rrm_failed = rrm_future.result()
+            rmf_data, rmf_failed = rmf_future.result()
+            degraded = cons_failed or rrm_failed or rmf_failed
+            shared_stages = {
+                "rrm": rrm_table, "consequences": conn_data, "rmf": rmf_data, "degraded": degraded
+            }
         brr_data = scoring.calculate_brr()
+        total_benefit_score = brr_data['total_benefit_score']
+        total_risk_score = brr_data['total_risk_score']
+        brr = brr_data['brr']
+        brr_interpretation = brr_data['interpretation']
 
-        # 8. RRM and Consequences (if available)
+        # 9. Score aggregation (calculate_brr already summed both lists)
+        total_weighted_score = total_benefit_score + total_risk_score
         
-
-        # 9. Score aggregation
-        total_weighted_score = sum(scoring.benefit_scores) + sum(scoring.risk_scores)
-        
-        score_breakdown = {}
-        for key, src in [
+        score_sources = (
             ("benefit_factor", regulatory_result.get("benefit_score")),
             ("market_experience", fda_result.get("mme_score")),
             ("pubmed_evidence", pubmed_result.get("evidence_score")),
             ("contraindication_risk", contra_res.get("contra_score")),
-        ]:
-            if src and isinstance(src, dict) and "weighted_score" in src:
-                score_breakdown[key] = src
-
+        )
         if has_duplication_check and duplication_result:
-            dup_score = duplication_result.get("duplication_score")
-            if dup_score and isinstance(dup_score, dict) and "weighted_score" in dup_score:
-                score_breakdown["therapeutic_duplication"] = dup_score
+            score_sources += (("therapeutic_duplication", duplication_result.get("duplication_score")),)
+
+        score_breakdown = {
+            name: src for name, src in score_sources
+            if isinstance(src, dict) and "weighted_score" in src
+        }
 
         # Store complete analysis summary
         scoring.add_analysis("summary", {
             "drug": drug,
             "diagnosis": diagnosis,
             "total_weighted_score": total_weighted_score,
-            "total_benefit_score": brr_data['total_benefit_score'],
-            "total_risk_score": brr_data['total_risk_score'],
-            "brr": brr_data['brr'],
-            "brr_interpretation": brr_data['interpretation'],
+            "total_benefit_score": total_benefit_score,
+            "total_risk_score": total_risk_score,
+            "brr": brr,
+            "brr_interpretation": brr_interpretation,
             "score_breakdown": score_breakdown,
             "therapeutic_duplication_performed": has_duplication_check,
             "rct_count": rct_count,
@@ -169,19 +330,20 @@ def analyze_single_drug(
             "rmf":rmf_data
         })
 
-        output_file = scoring.save_to_json()
+        payload = scoring.to_json_bytes()
+        output_file = scoring.save_to_json(writer, payload)
         
-        print(f"[{prefix} {thread_id}] ✓ Complete - BRR: {brr_data['brr']} ({brr_data['interpretation']})")
+        log.info("%s ✓ Complete - BRR: %s (%s)", tag, brr, brr_interpretation)
         # print(f'has drug interation is {has_drug_interactions},has contraindicatio is {has_contraindication},has life threatining adrs{has_lt_adrs} has serius adrs{has_serious_adrs}')
-        return {
+        result = {
             "success": True,
             "drug": drug,
             "diagnosis": diagnosis,
             "total_score": total_weighted_score,
-            "total_benefit_score": brr_data['total_benefit_score'],
-            "total_risk_score": brr_data['total_risk_score'],
-            "brr": brr_data['brr'],
-            "brr_interpretation": brr_data['interpretation'],
+            "total_benefit_score": total_benefit_score,
+            "total_risk_score": total_risk_score,
+            "brr": brr,
+            "brr_interpretation": brr_interpretation,
             "output_file": output_file,
             "duplication_checked": has_duplication_check,
             "rct_count": rct_count,
@@ -190,17 +352,22 @@ def analyze_single_drug(
             "has_serious_adrs": has_serious_adrs,
             "has_drug_interactions": has_drug_interactions
         }
+        # A stage that fell back to its default is usually a transient
+        # service error; caching would serve that result until it expires
+        if not degraded:
+            _result_cache.set(result_key, {
+                "result": result, "payload": payload.decode("utf-8"), "shared_stages": shared_stages
+            })
+        return result, shared_stages
 
     except Exception as e:
-        print(f"[{prefix} {thread_id}] ✗ Error: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("%s ✗ Error: %s", tag, e)
         return {
             "success": False,
             "drug": drug,
             "diagnosis": diagnosis,
             "error": str(e)
-        }
+        }, None
 
 
 def analyze_drug_diagnosis(
@@ -211,7 +378,8 @@ def analyze_drug_diagnosis(
     thread_id: int,
     duplication_result: dict | None = None,
     has_duplication_check: bool = False,
-    full_patient_data: dict = None
+    full_patient_data: dict = None,
+    writer=None
 ) -> dict:
     """
     Main analysis function - analyzes drug and finds alternatives if contraindicated
@@ -225,13 +393,15 @@ def analyze_drug_diagnosis(
         duplication_result: Pre-computed duplication result
         has_duplication_check: Whether duplication was checked
         full_patient_data: Full patient data including currentDiagnoses, chiefComplaints
+        writer: Optional FileWriter shared by all tasks for their result files
     
     Returns:
         Dictionary with primary analysis and alternative analyses (if applicable)
     """
     
-    # Analyze the primary drug
-    primary_result = analyze_single_drug(
+    # Analyze the primary drug; its patient-level stage results are handed
+    # to the alternatives, which only read them
+    primary_result, shared_stages = _analyze_drug(
         drug=drug,
         diagnosis=diagnosis,
         patient=patient,
@@ -240,7 +410,8 @@ def analyze_drug_diagnosis(
         duplication_result=duplication_result,
         has_duplication_check=has_duplication_check,
         is_alternative=False,
-        full_patient_data=full_patient_data
+        full_patient_data=full_patient_data,
+        writer=writer
     )
     
     # Check if we need to find alternatives
@@ -252,23 +423,27 @@ def analyze_drug_diagnosis(
     alternative_analyses = []
     
     if has_contraindication:
-        print(f"\n[Thread {thread_id}] ⚠️  CONTRAINDICATION DETECTED - Searching for alternatives...")
+        log.info("[Thread %s] ⚠️  CONTRAINDICATION DETECTED - Searching for alternatives...", thread_id)
         
         try:
             # Find alternatives using FDA API
-            finder = FDAAlternativesFinder()
-            alternatives = finder.get_top_alternatives(drug, diagnosis, top_n=3)
+            alternatives = _alternatives_cache.get_or_compute(
+                (drug.strip().lower(), diagnosis.strip().lower(), ALTERNATIVES_TOP_N),
+                lambda: _get_alternatives_finder().get_top_alternatives(drug, diagnosis, top_n=ALTERNATIVES_TOP_N)
+            )
             
             if alternatives:
-                print(f"[Thread {thread_id}] ✓ Found {len(alternatives)} alternatives - Running full analysis...")
+                log.info("[Thread %s] ✓ Found %d alternatives - Running full analysis...", thread_id, len(alternatives))
                 
-                # Perform FULL analysis on each alternative
+                # Perform FULL analysis on each alternative, all at once
+                alt_futures = []
                 for idx, alt in enumerate(alternatives, 1):
                     alt_name = alt['Active_Moiety']
-                    print(f"\n[Thread {thread_id}] Analyzing Alternative {idx}/{len(alternatives)}: {alt_name}")
+                    log.info("[Thread %s] Analyzing Alternative %d/%d: %s", thread_id, idx, len(alternatives), alt_name)
                     
                     # Run complete analysis for alternative
-                    alt_result = analyze_single_drug(
+                    alt_futures.append(_alternative_executor.submit(
+                        analyze_single_drug,
                         drug=alt_name,
                         diagnosis=diagnosis,
                         patient=patient,
@@ -277,8 +452,13 @@ def analyze_drug_diagnosis(
                         duplication_result=None,
                         has_duplication_check=False,
                         is_alternative=True,
-                        full_patient_data=full_patient_data
-                    )
+                        full_patient_data=full_patient_data,
+                        writer=writer,
+                        shared_stages=shared_stages
+                    ))
+                
+                for idx, (alt, alt_future) in enumerate(zip(alternatives, alt_futures), 1):
+                    alt_result = alt_future.result()
                     
                     # Add alternative metadata and link to primary drug
                     if alt_result.get("success"):
@@ -293,14 +473,12 @@ def analyze_drug_diagnosis(
                         }
                         alternative_analyses.append(alt_result)
                 
-                print(f"[Thread {thread_id}] ✓ Completed analysis for {len(alternative_analyses)} alternatives")
+                log.info("[Thread %s] ✓ Completed analysis for %d alternatives", thread_id, len(alternative_analyses))
             else:
-                print(f"[Thread {thread_id}] ⚠️  No alternatives found in FDA database")
+                log.warning("[Thread %s] ⚠️  No alternatives found in FDA database", thread_id)
                 
         except Exception as e:
-            print(f"[Thread {thread_id}] ✗ Error finding/analyzing alternatives: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("[Thread %s] ✗ Error finding/analyzing alternatives: %s", thread_id, e)
     
     # Return comprehensive result with alternatives attached
     return {
@@ -5,36 +5,153 @@ Non-blocking database operations using threading
 """
 
 import psycopg2
-from psycopg2.extras import Json, RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_batch, execute_values
+from psycopg2.extensions import TRANSACTION_STATUS_UNKNOWN, connection as PGConnection
+from psycopg2.pool import ThreadedConnectionPool
 import threading
 import queue
 import os
+import time
+import logging
 from datetime import datetime
 from typing import Dict, Optional, List
 import json
 from contextlib import contextmanager
+from itertools import combinations
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
-class DatabaseHandler:
-    """Async database handler with connection pooling"""
+
+log = logging.getLogger(__name__)
+
+
+# The worker commits queued writes in batches: up to BATCH_MAX_OPERATIONS
+# writes that arrive within BATCH_WAIT seconds share one transaction
+BATCH_MAX_OPERATIONS = 128
+BATCH_WAIT = 0.05  # seconds
+
+# Queued writes are spread over this many worker threads by job_id, so
+# different jobs are written concurrently (psycopg2 releases the GIL while
+# waiting on the server) while each job's writes stay in order
+WRITER_THREADS = int(os.getenv('DB_WRITER_THREADS', '4'))
+
+# Rows fetched per round trip when streaming query results
+RECENT_FETCH_SIZE = 256
+
+# Columns returned by iter_recent_analyses, read with a plain tuple cursor
+_RECENT_COLUMNS = (
+    'job_id', 'status', 'created_at', 'completed_at', 'execution_time',
+    'patient_name', 'patient_mrn', 'num_medications', 'num_diagnoses',
+    'has_critical_alerts', 'has_warnings'
+)
+_RECENT_SELECT = ", ".join(_RECENT_COLUMNS)
+
+# Hot INSERT, parsed and planned once per pooled connection with PREPARE
+_SAVE_ANALYSIS_SQL = """
+    INSERT INTO analysis_results (
+        job_id, patient_name, patient_mrn, patient_age, patient_gender,
+        status, created_at, started_at, completed_at, execution_time,
+        input_data, result_data, error_message,
+        num_medications, num_diagnoses, has_critical_alerts, has_warnings
+    ) VALUES ({values})
+    ON CONFLICT (job_id) DO UPDATE SET
+        status = EXCLUDED.status,
+        started_at = EXCLUDED.started_at,
+        completed_at = EXCLUDED.completed_at,
+        execution_time = EXCLUDED.execution_time,
+        result_data = EXCLUDED.result_data,
+        error_message = EXCLUDED.error_message,
+        has_critical_alerts = EXCLUDED.has_critical_alerts,
+        has_warnings = EXCLUDED.has_warnings
+"""
+_PREPARE_SAVE_ANALYSIS = "PREPARE save_analysis AS " + _SAVE_ANALYSIS_SQL.format(
+    values=", ".join(f"${i}" for i in range(1, 18))
+)
+_EXECUTE_SAVE_ANALYSIS = "EXECUTE save_analysis (" + ", ".join(["%s"] * 17) + ")"
+_INSERT_SAVE_ANALYSIS = _SAVE_ANALYSIS_SQL.format(values=", ".join(["%s"] * 17))
+
+
+# Every variant of the job status UPDATE, keyed by the optional columns it
+# sets (in _STATUS_OPTIONAL_FIELDS order), built once instead of per call
+_STATUS_OPTIONAL_FIELDS = ('started_at', 'completed_at', 'execution_time', 'error_message')
+_STATUS_UPDATE_SQL = {
+    fields: (
+        "UPDATE analysis_results SET "
+        + ", ".join(f"{field} = %s" for field in ('status',) + fields)
+        + " WHERE job_id = %s"
+    )
+    for n in range(len(_STATUS_OPTIONAL_FIELDS) + 1)
+    for fields in combinations(_STATUS_OPTIONAL_FIELDS, n)
+}
+
+_fromiso = datetime.fromisoformat
+
+
+def _dumps_json(value) -> str:
+    """Compact JSON text for a jsonb parameter (orjson when installed)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(value)
+
+
+def _cached_json(job_data: Dict, field: str, cache_field: str) -> Optional[str]:
+    """
+    JSON text of job_data[field], serialized once per job_data and kept on it,
+    so a savepoint replay of the same write does not serialize it again
+    """
+    if cache_field not in job_data:
+        value = job_data.get(field)
+        job_data[cache_field] = _dumps_json(value) if value else None
+    return job_data[cache_field]
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """ISO timestamp string -> datetime (None stays None)"""
+    return _fromiso(value) if value else None
+
+
+def _status_update(job_id: str, status: str, kwargs: Dict):
+    """Pick the status UPDATE statement for the given fields and build its parameters"""
+    fields = []
+    params = [status]
     
-    _instance = None
-    _lock = threading.Lock()
+    # Timestamps are only set when given; the other fields whenever passed
+    for field in _STATUS_OPTIONAL_FIELDS:
+        if field in ('started_at', 'completed_at'):
+            if kwargs.get(field):
+                fields.append(field)
+                params.append(_fromiso(kwargs[field]))
+        elif field in kwargs:
+            fields.append(field)
+            params.append(kwargs[field])
     
-    def __new__(cls):
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super().__new__(cls)
-                    cls._instance._initialized = False
-        return cls._instance
+    params.append(job_id)
+    return _STATUS_UPDATE_SQL[tuple(fields)], params
+
+
+class PreparedConnection(PGConnection):
+    """psycopg2 connection that remembers whether the hot statements are prepared on it"""
+    statements_prepared = False
+    _write_cursor = None
+    
+    def write_cursor(self):
+        """Plain cursor reused by every batch on this connection (closed with it)"""
+        if self._write_cursor is None or self._write_cursor.closed:
+            self._write_cursor = self.cursor()
+        return self._write_cursor
+
+
+class DatabaseHandler:
+    """
+    Async database handler with connection pooling
+    Use the shared module-level instance (db_handler / get_handler())
+    """
     
     def __init__(self):
-        if self._initialized:
-            return
-        
-        self._initialized = True
-        
         # Database configuration from environment
         self.db_config = {
             'host': os.getenv('DB_HOST', 'localhost'),
@@ -42,17 +159,28 @@ class DatabaseHandler:
             'database': os.getenv('DB_NAME', 'drug_analysis'),
             'user': os.getenv('DB_USER', 'drug_api_user'),
             'password': os.getenv('DB_PASSWORD', ''),
+            # TCP keepalives so dead idle connections are noticed by the OS
+            'keepalives': 1,
+            'keepalives_idle': int(os.getenv('DB_KEEPALIVES_IDLE', '30')),
         }
         
-        # Queue for async operations
-        self.operation_queue = queue.Queue()
+        # One queue per worker thread for async operations
+        self.operation_queues = [queue.Queue() for _ in range(max(1, WRITER_THREADS))]
         self.running = False
-        self.worker_thread = None
+        self.worker_threads = []
         
-        # Connection pool (simple implementation)
-        self.connections = []
+        # Connection pool: opened lazily, then up to pool_size connections
+        # stay open between uses; bursts may open up to max_connections,
+        # closed again when returned.
+        # In production, point DB_HOST at PgBouncer (transaction pooling)
+        # to share backends across server processes, with
+        # DB_PREPARED_STATEMENTS=0 since prepared statements are per session.
         self.pool_size = 5
-        self.connections_lock = threading.Lock()
+        self.max_connections = int(os.getenv('DB_MAX_CONNECTIONS', '20'))
+        self._pool = None
+        self.use_prepared_statements = os.getenv('DB_PREPARED_STATEMENTS', '1') != '0'
+        # ThreadedConnectionPool raises when exhausted; make callers wait instead
+        self._pool_slots = threading.BoundedSemaphore(self.max_connections)
         
         # Initialize connection pool
         self._init_pool()
@@ -63,42 +191,56 @@ class DatabaseHandler:
         print(f"✓ Database handler initialized (Host: {self.db_config['host']}, DB: {self.db_config['database']})")
     
     def _init_pool(self):
-        """Initialize connection pool"""
+        """Initialize connection pool (one connection now, the rest on demand)"""
         try:
-            for _ in range(self.pool_size):
-                conn = psycopg2.connect(**self.db_config)
-                self.connections.append(conn)
-            print(f"✓ Connection pool initialized ({self.pool_size} connections)")
+            self._pool = ThreadedConnectionPool(
+                minconn=1,
+                maxconn=self.max_connections,
+                connection_factory=PreparedConnection,
+                **self.db_config
+            )
+            # minconn is also how many idle connections putconn keeps;
+            # raise it after the eager open so pool_size stay warm once used
+            self._pool.minconn = self.pool_size
+            print(f"✓ Connection pool initialized (up to {self.pool_size} idle connections)")
         except Exception as e:
-            print(f"✗ Failed to initialize connection pool: {e}")
+            log.error("✗ Failed to initialize connection pool: %s", e)
             raise
     
     @contextmanager
     def get_connection(self):
         """Get a connection from the pool (context manager)"""
         conn = None
+        self._pool_slots.acquire()
         try:
-            with self.connections_lock:
-                if self.connections:
-                    conn = self.connections.pop()
-                else:
-                    # Create new connection if pool is empty
-                    conn = psycopg2.connect(**self.db_config)
+            conn = self._pool.getconn()
+            if conn.closed or conn.info.transaction_status == TRANSACTION_STATUS_UNKNOWN:
+                # Dropped by the server or broken while idle; replace it
+                self._pool.putconn(conn, close=True)
+                conn = None
+                conn = self._pool.getconn()
+            if self.use_prepared_statements and not conn.statements_prepared:
+                self._prepare_statements(conn)
             
             yield conn
             
         except Exception as e:
-            if conn:
+            if conn and not conn.closed:
                 conn.rollback()
             raise e
         finally:
             if conn:
-                with self.connections_lock:
-                    # Return connection to pool
-                    if len(self.connections) < self.pool_size:
-                        self.connections.append(conn)
-                    else:
-                        conn.close()
+                # Return connection to pool (closed if the pool already holds
+                # pool_size idle connections or it is broken)
+                self._pool.putconn(conn, close=bool(conn.closed))
+            self._pool_slots.release()
+    
+    def _prepare_statements(self, conn):
+        """PREPARE the hot statements on a new connection (they live for its session)"""
+        with conn.cursor() as cursor:
+            cursor.execute(_PREPARE_SAVE_ANALYSIS)
+        conn.commit()
+        conn.statements_prepared = True
     
     def start_worker(self):
         """Start background worker thread for async operations"""
@@ -106,60 +248,138 @@ class DatabaseHandler:
             return
         
         self.running = True
-        self.worker_thread = threading.Thread(
-            target=self._worker,
-            name="DatabaseWorker",
-            daemon=True
-        )
-        self.worker_thread.start()
-        print("✓ Database worker thread started")
+        self.worker_threads = [
+            threading.Thread(
+                target=self._worker,
+                args=(operation_queue,),
+                name=f"DatabaseWorker-{i}",
+                daemon=True
+            )
+            for i, operation_queue in enumerate(self.operation_queues)
+        ]
+        for worker_thread in self.worker_threads:
+            worker_thread.start()
+        print(f"✓ Database worker threads started ({len(self.worker_threads)})")
     
     def stop_worker(self):
-        """Stop background worker thread"""
+        """Stop background worker threads"""
         self.running = False
-        self.operation_queue.put(None)  # Signal to stop
-        if self.worker_thread:
-            self.worker_thread.join(timeout=5)
+        for operation_queue in self.operation_queues:
+            operation_queue.put(None)  # Signal to stop
+        for worker_thread in self.worker_threads:
+            worker_thread.join(timeout=5)
         
         # Close all connections
-        with self.connections_lock:
-            for conn in self.connections:
-                conn.close()
-            self.connections.clear()
+        if self._pool is not None:
+            self._pool.closeall()
         
-        print("✓ Database worker thread stopped")
+        print("✓ Database worker threads stopped")
     
-    def _worker(self):
-        """Background worker that processes database operations"""
-        print("✓ DatabaseWorker started")
-        
+    def _worker(self, operation_queue):
+        """Background worker that processes one queue's database operations in batches"""
         while self.running:
             try:
-                operation = self.operation_queue.get(timeout=1)
-                
-                if operation is None:
-                    break
-                
-                func, args, kwargs = operation
-                try:
-                    func(*args, **kwargs)
-                except Exception as e:
-                    print(f"✗ Database operation error: {e}")
-                    import traceback
-                    traceback.print_exc()
-                
-                self.operation_queue.task_done()
-                
+                operation = operation_queue.get(timeout=1)
             except queue.Empty:
                 continue
-            except Exception as e:
-                print(f"✗ DatabaseWorker error: {e}")
+            
+            # Coalesce whatever else arrives shortly into the same transaction
+            operations = []
+            stop = operation is None
+            if not stop:
+                operations.append(operation)
+            deadline = time.monotonic() + BATCH_WAIT
+            while not stop and len(operations) < BATCH_MAX_OPERATIONS and time.monotonic() < deadline:
+                try:
+                    operation = operation_queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if operation is None:
+                    stop = True
+                else:
+                    operations.append(operation)
+            
+            try:
+                if operations:
+                    self._execute_writes(operations)
+            except Exception:
+                log.exception("✗ DatabaseWorker error")
+            finally:
+                for _ in range(len(operations) + stop):
+                    operation_queue.task_done()
+            
+            if stop:
+                break
+    
+    def _execute_writes(self, operations):
+        """
+        Run queued writes in one transaction (one commit for the whole batch)
+        The batch is sent as-is first; if a write fails it is replayed with a
+        savepoint per write, so only the failing one is rolled back
+        """
+        with self.get_connection() as conn:
+            cursor = conn.write_cursor()
+            
+            messages = None
+            try:
+                messages = self._execute_batched(cursor, operations)
+            except Exception:
+                conn.rollback()
+            if messages is None:
+                messages = self._execute_isolated(cursor, operations)
+            
+            conn.commit()
+        
+        for message in messages:
+            if message:
+                log.info(message)
+    
+    def _execute_batched(self, cursor, operations):
+        """
+        Run writes in order; consecutive status updates that use the same
+        statement are sent together with execute_batch
+        """
+        messages = []
+        batch_sql, batch_params = None, []
+        
+        for write, args, kwargs in operations:
+            if write == self._write_job_status:
+                sql, params = _status_update(*args, kwargs)
+                if sql != batch_sql and batch_params:
+                    execute_batch(cursor, batch_sql, batch_params, page_size=100)
+                    batch_params = []
+                batch_sql = sql
+                batch_params.append(params)
+                continue
+            
+            if batch_params:
+                execute_batch(cursor, batch_sql, batch_params, page_size=100)
+                batch_params = []
+            messages.append(write(cursor, *args, **kwargs))
         
-        print("✓ DatabaseWorker stopped")
+        if batch_params:
+            execute_batch(cursor, batch_sql, batch_params, page_size=100)
+        return messages
+    
+    def _execute_isolated(self, cursor, operations):
+        """Run writes each under its own savepoint, reporting the ones that fail"""
+        messages = []
+        for write, args, kwargs in operations:
+            cursor.execute("SAVEPOINT queued_write")
+            try:
+                message = write(cursor, *args, **kwargs)
+            except Exception:
+                cursor.execute("ROLLBACK TO SAVEPOINT queued_write")
+                log.exception("✗ Database operation error (%s)", write.__name__)
+                continue
+            cursor.execute("RELEASE SAVEPOINT queued_write")
+            messages.append(message)
+        return messages
     
-    def _queue_operation(self, func, *args, **kwargs):
-        """Queue a database operation for async execution"""
-        self.operation_queue.put((func, args, kwargs))
+    def _queue_operation(self, func, job_id, *args, **kwargs):
+        """Queue a database operation for async execution on its job's worker"""
+        operation_queue = self.operation_queues[hash(job_id) % len(self.operation_queues)]
+        operation_queue.put((func, (job_id,) + args, kwargs))
     
     # ========================================================================
     # ASYNC OPERATIONS (Non-blocking)
@@ -173,7 +393,7 @@ class DatabaseHandler:
             job_id: Unique job identifier
             job_data: Complete job data including status, input, result
         """
-        self._queue_operation(self._save_analysis_sync, job_id, job_data)
+        self._queue_operation(self._write_analysis, job_id, job_data)
     
     def update_job_status_async(self, job_id: str, status: str, **kwargs):
         """
@@ -184,152 +404,107 @@ class DatabaseHandler:
             status: New status (queued, processing, completed, failed)
             **kwargs: Additional fields to update (started_at, completed_at, etc.)
         """
-        self._queue_operation(self._update_job_status_sync, job_id, status, **kwargs)
+        self._queue_operation(self._write_job_status, job_id, status, **kwargs)
     
     # ========================================================================
     # SYNC OPERATIONS (Blocking - called by worker thread)
     # ========================================================================
     
+    def _write_analysis(self, cursor, job_id: str, job_data: Dict) -> str:
+        """Write one analysis result with the given cursor (caller commits)"""
+        # Extract patient info
+        input_data = job_data.get('input', {})
+        patient_info = input_data.get('patientInfo', {})
+        
+        # Extract result summary
+        result = job_data.get('result')
+        error = job_data.get('error')
+        
+        # Count medications and diagnoses
+        diagnoses = input_data.get('currentDiagnoses', [])
+        num_diagnoses = len(diagnoses)
+        num_medications = sum(
+            len(diagnosis.get('treatment', {}).get('medications', [])) for diagnosis in diagnoses
+        )
+        
+        # Check for critical alerts
+        has_critical = False
+        has_warnings = False
+        
+        if result:
+            alerts = result.get('alerts', {})
+            has_critical = bool(alerts.get('critical'))
+            has_warnings = bool(alerts.get('warnings'))
+        
+        # Insert main record (statement prepared once per connection)
+        statement = _EXECUTE_SAVE_ANALYSIS if cursor.connection.statements_prepared else _INSERT_SAVE_ANALYSIS
+        cursor.execute(statement, (
+            job_id,
+            patient_info.get('fullName'),
+            patient_info.get('mrn'),
+            patient_info.get('age'),
+            patient_info.get('gender'),
+            job_data.get('status', 'unknown'),
+            _fromiso(job_data['created_at']),
+            _parse_timestamp(job_data.get('started_at')),
+            _parse_timestamp(job_data.get('completed_at')),
+            job_data.get('execution_time'),
+            _cached_json(job_data, 'input', '_input_json') or '{}',
+            _cached_json(job_data, 'result', '_result_json'),
+            error,
+            num_medications,
+            num_diagnoses,
+            has_critical,
+            has_warnings
+        ))
+        
+        # Insert medication analyses (one multi-row INSERT per page)
+        if result and 'medication_analysis' in result:
+            med_rows = [
+                (
+                    job_id,
+                    medication.get('medication_name'),
+                    medication.get('indication'),
+                    float(medication.get('benefit_risk_score', {}).get('ratio_value', 0)),
+                    medication.get('safety_profile', {}).get('outcome'),
+                    medication.get('contraindication_analysis', {}).get('contraindication_found', False),
+                    False,  # has_lt_adrs - extract from result
+                    False   # has_serious_adrs - extract from result
+                )
+                for medication in (
+                    med_analysis.get('medication', {}) for med_analysis in result['medication_analysis']
+                )
+            ]
+            
+            if med_rows:
+                execute_values(cursor, """
+                    INSERT INTO medication_analyses (
+                        job_id, medication_name, diagnosis,
+                        brr_score, safety_outcome,
+                        has_contraindication, has_lt_adrs, has_serious_adrs
+                    ) VALUES %s
+                    ON CONFLICT DO NOTHING
+                """, med_rows, page_size=100)
+        
+        return f"✓ Saved analysis for job {job_id[:8]}... to database"
+    
+    def _write_job_status(self, cursor, job_id: str, status: str, **kwargs):
+        """Update one job's status with the given cursor (caller commits)"""
+        cursor.execute(*_status_update(job_id, status, kwargs))
+    
     def _save_analysis_sync(self, job_id: str, job_data: Dict):
-        """Save analysis result to database (called by worker thread)"""
+        """Save analysis result to database (blocking)"""
         try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Extract patient info
-                input_data = job_data.get('input', {})
-                patient_info = input_data.get('patientInfo', {})
-                
-                # Extract result summary
-                result = job_data.get('result')
-                error = job_data.get('error')
-                
-                # Count medications and diagnoses
-                num_medications = 0
-                num_diagnoses = len(input_data.get('currentDiagnoses', []))
-                
-                for diagnosis in input_data.get('currentDiagnoses', []):
-                    meds = diagnosis.get('treatment', {}).get('medications', [])
-                    num_medications += len(meds)
-                
-                # Check for critical alerts
-                has_critical = False
-                has_warnings = False
-                
-                if result:
-                    alerts = result.get('alerts', {})
-                    has_critical = bool(alerts.get('critical'))
-                    has_warnings = bool(alerts.get('warnings'))
-                
-                # Insert main record
-                cursor.execute("""
-                    INSERT INTO analysis_results (
-                        job_id, patient_name, patient_mrn, patient_age, patient_gender,
-                        status, created_at, started_at, completed_at, execution_time,
-                        input_data, result_data, error_message,
-                        num_medications, num_diagnoses, has_critical_alerts, has_warnings
-                    ) VALUES (
-                        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                    )
-                    ON CONFLICT (job_id) DO UPDATE SET
-                        status = EXCLUDED.status,
-                        started_at = EXCLUDED.started_at,
-                        completed_at = EXCLUDED.completed_at,
-                        execution_time = EXCLUDED.execution_time,
-                        result_data = EXCLUDED.result_data,
-                        error_message = EXCLUDED.error_message,
-                        has_critical_alerts = EXCLUDED.has_critical_alerts,
-                        has_warnings = EXCLUDED.has_warnings
-                """, (
-                    job_id,
-                    patient_info.get('fullName'),
-                    patient_info.get('mrn'),
-                    patient_info.get('age'),
-                    patient_info.get('gender'),
-                    job_data.get('status', 'unknown'),
-                    datetime.fromisoformat(job_data['created_at']),
-                    datetime.fromisoformat(job_data['started_at']) if job_data.get('started_at') else None,
-                    datetime.fromisoformat(job_data['completed_at']) if job_data.get('completed_at') else None,
-                    job_data.get('execution_time'),
-                    Json(input_data),
-                    Json(result) if result else None,
-                    error,
-                    num_medications,
-                    num_diagnoses,
-                    has_critical,
-                    has_warnings
-                ))
-                
-                # Insert medication analyses
-                if result and 'medication_analysis' in result:
-                    for med_analysis in result['medication_analysis']:
-                        medication = med_analysis.get('medication', {})
-                        
-                        cursor.execute("""
-                            INSERT INTO medication_analyses (
-                                job_id, medication_name, diagnosis,
-                                brr_score, safety_outcome,
-                                has_contraindication, has_lt_adrs, has_serious_adrs
-                            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                            ON CONFLICT DO NOTHING
-                        """, (
-                            job_id,
-                            medication.get('medication_name'),
-                            medication.get('indication'),
-                            float(medication.get('benefit_risk_score', {}).get('ratio_value', 0)),
-                            medication.get('safety_profile', {}).get('outcome'),
-                            medication.get('contraindication_analysis', {}).get('contraindication_found', False),
-                            False,  # has_lt_adrs - extract from result
-                            False   # has_serious_adrs - extract from result
-                        ))
-                
-                conn.commit()
-                print(f"✓ Saved analysis for job {job_id[:8]}... to database")
-                
-        except Exception as e:
-            print(f"✗ Error saving analysis {job_id[:8]}...: {e}")
-            import traceback
-            traceback.print_exc()
+            self._execute_writes([(self._write_analysis, (job_id, job_data), {})])
+        except Exception:
+            log.exception("✗ Error saving analysis %s...", job_id[:8])
     
     def _update_job_status_sync(self, job_id: str, status: str, **kwargs):
-        """Update job status in database (called by worker thread)"""
+        """Update job status in database (blocking)"""
         try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Build dynamic UPDATE query
-                update_fields = ['status = %s']
-                params = [status]
-                
-                if 'started_at' in kwargs and kwargs['started_at']:
-                    update_fields.append('started_at = %s')
-                    params.append(datetime.fromisoformat(kwargs['started_at']))
-                
-                if 'completed_at' in kwargs and kwargs['completed_at']:
-                    update_fields.append('completed_at = %s')
-                    params.append(datetime.fromisoformat(kwargs['completed_at']))
-                
-                if 'execution_time' in kwargs:
-                    update_fields.append('execution_time = %s')
-                    params.append(kwargs['execution_time'])
-                
-                if 'error_message' in kwargs:
-                    update_fields.append('error_message = %s')
-                    params.append(kwargs['error_message'])
-                
-                params.append(job_id)
-                
-                query = f"""
-                    UPDATE analysis_results 
-                    SET {', '.join(update_fields)}
-                    WHERE job_id = %s
-                """
-                
-                cursor.execute(query, params)
-                conn.commit()
-                
+            self._execute_writes([(self._write_job_status, (job_id, status), kwargs)])
         except Exception as e:
-            print(f"✗ Error updating job status {job_id[:8]}...: {e}")
+            log.error("✗ Error updating job status %s...: %s", job_id[:8], e)
     
     # ========================================================================
     # QUERY OPERATIONS (Sync - for API endpoints)
@@ -382,7 +557,7 @@ class DatabaseHandler:
                 return None
                 
         except Exception as e:
-            print(f"✗ Error fetching job {job_id[:8]}...: {e}")
+            log.error("✗ Error fetching job %s...: %s", job_id[:8], e)
             return None
     
     def get_recent_analyses(self, limit: int = 10, status: str = None) -> List[Dict]:
@@ -397,60 +572,57 @@ class DatabaseHandler:
             List of analysis records
         """
         try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor(cursor_factory=RealDictCursor)
-                
-                if status:
-                    cursor.execute("""
-                        SELECT job_id, status, created_at, completed_at, execution_time,
-                               patient_name, patient_mrn, num_medications, num_diagnoses,
-                               has_critical_alerts, has_warnings
-                        FROM analysis_results
-                        WHERE status = %s
-                        ORDER BY created_at DESC
-                        LIMIT %s
-                    """, (status, limit))
-                else:
-                    cursor.execute("""
-                        SELECT job_id, status, created_at, completed_at, execution_time,
-                               patient_name, patient_mrn, num_medications, num_diagnoses,
-                               has_critical_alerts, has_warnings
-                        FROM analysis_results
-                        ORDER BY created_at DESC
-                        LIMIT %s
-                    """, (limit,))
-                
-                results = cursor.fetchall()
-                
-                # Format timestamps
-                formatted_results = []
-                for row in results:
-                    data = dict(row)
-                    if data.get('created_at'):
-                        data['created_at'] = data['created_at'].isoformat()
-                    if data.get('completed_at'):
-                        data['completed_at'] = data['completed_at'].isoformat()
-                    if data.get('execution_time'):
-                        data['execution_time'] = float(data['execution_time'])
-                    formatted_results.append(data)
-                
-                return formatted_results
-                
+            return list(self.iter_recent_analyses(limit, status))
         except Exception as e:
-            print(f"✗ Error fetching recent analyses: {e}")
+            log.error("✗ Error fetching recent analyses: %s", e)
             return []
     
+    def iter_recent_analyses(self, limit: int = 10, status: str = None):
+        """
+        Stream recent analyses from a server-side cursor, RECENT_FETCH_SIZE rows
+        per round trip, so large limits never materialize the whole result
+        
+        Holds a pooled connection until the iteration finishes
+        """
+        where = "WHERE status = %s" if status else ""
+        params = (status, limit) if status else (limit,)
+        
+        with self.get_connection() as conn:
+            with conn.cursor(name="recent_analyses") as cursor:
+                cursor.itersize = RECENT_FETCH_SIZE
+                cursor.execute(f"""
+                    SELECT {_RECENT_SELECT}
+                    FROM analysis_results
+                    {where}
+                    ORDER BY created_at DESC
+                    LIMIT %s
+                """, params)
+                
+                for job_id, row_status, created_at, completed_at, execution_time, *rest in cursor:
+                    # Format timestamps
+                    yield dict(zip(_RECENT_COLUMNS, (
+                        job_id,
+                        row_status,
+                        created_at.isoformat() if created_at else created_at,
+                        completed_at.isoformat() if completed_at else completed_at,
+                        float(execution_time) if execution_time else execution_time,
+                        *rest
+                    )))
+            
+            # End the read-only transaction the named cursor needed
+            conn.commit()
+    
     def get_database_stats(self) -> Dict:
         """Get database statistics"""
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor(cursor_factory=RealDictCursor)
+                cursor = conn.cursor()
                 
                 cursor.execute("SELECT * FROM analysis_stats")
                 stats = cursor.fetchone()
                 
                 if stats:
-                    result = dict(stats)
+                    result = dict(zip((column.name for column in cursor.description), stats))
                     # Convert Decimal to float
                     for key in ['avg_execution_time', 'max_execution_time', 'min_execution_time']:
                         if result.get(key):
@@ -460,7 +632,7 @@ class DatabaseHandler:
                 return {}
                 
         except Exception as e:
-            print(f"✗ Error fetching database stats: {e}")
+            log.error("✗ Error fetching database stats: %s", e)
             return {}
     
     def cleanup_old_jobs(self, days: int = 30) -> int:
@@ -479,9 +651,9 @@ class DatabaseHandler:
                 
                 cursor.execute("""
                     DELETE FROM analysis_results
-                    WHERE created_at < NOW() - INTERVAL '%s days'
+                    WHERE created_at < NOW() - make_interval(days => %s)
                     AND status IN ('completed', 'failed')
-                """, (days,))
+                """, (int(days),))
                 
                 deleted_count = cursor.rowcount
                 conn.commit()
@@ -490,9 +662,14 @@ class DatabaseHandler:
                 return deleted_count
                 
         except Exception as e:
-            print(f"✗ Error cleaning up old jobs: {e}")
+            log.error("✗ Error cleaning up old jobs: %s", e)
             return 0
 
 
 # Global database handler instance
-db_handler = DatabaseHandler()
\ No newline at end of file
+db_handler = DatabaseHandler()
+
+
+def get_handler() -> DatabaseHandler:
+    """Return the shared database handler"""
+    return db_handler
@@ -0,0 +1,85 @@
+
+# ================================
+# utils/disk_cache.py
+# ================================
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.expanduser("~/.cache/bra"))
+
+
+def cache_key(*parts) -> str:
+    """
+    Stable content hash of JSON-serializable inputs
+    """
+
+    blob = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.blake2b(blob, digest_size=16).hexdigest()
+
+
+class DiskCache:
+    """
+    SQLite-backed key/value cache with a TTL, shared by threads, processes and runs
+    Values must be JSON-serializable; a TTL of 0 (or an unusable path) disables it
+    """
+
+    def __init__(self, name: str, ttl: float, path: str | None = None):
+        self.name = name
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = None
+        if ttl > 0:
+            self._conn = self._open(path or os.path.join(CACHE_DIR, f"{name}.sqlite"))
+
+    def _open(self, path: str):
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value TEXT, created_at REAL)"
+            )
+            conn.commit()
+            return conn
+        except (OSError, sqlite3.Error) as e:
+            log.warning("%s disk cache disabled: %s", self.name, e)
+            return None
+
+    def get(self, key: str):
+        """Return the cached value, or None when missing or expired"""
+        if self._conn is None:
+            return None
+
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT value, created_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+
+        if not row or row[1] + self.ttl <= time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value):
+        if self._conn is None:
+            return
+
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), time.time())
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                log.warning("Could not write %s cache entry: %s", self.name, e)
@@ -4,8 +4,25 @@
 # ================================
 
 import json
+import logging
 import os
+import queue
 import sys
+import threading
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+log = logging.getLogger(__name__)
 
 
 def load_input(filename: str = "input.json", data: dict | None = None) -> dict:
@@ -20,13 +37,15 @@ def load_input(filename: str = "input.json", data: dict | None = None) -> dict:
             validate_input_schema(data)
             return data
 
-        # Case 2: file-based (CLI usage)
-        if not os.path.exists(filename):
+        # Case 2: file-based (CLI usage); a single open + read, no stat first
+        try:
+            with open(filename, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
             print(f"Error: Input file '{filename}' not found.")
             return None
 
-        with open(filename, "r") as f:
-            data = json.load(f)
+        data = loads_json_bytes(raw)
 
         validate_input_schema(data)
         return data
@@ -59,23 +78,13 @@ def extract_analysis_tasks(data: dict) -> list:
     Create task dictionaries for ALL medicines
     Returns list of dicts: [{"drug": "X", "diagnosis": "Y"}, ...]
     """
-    tasks = []
-
-    for diagnosis in data.get("currentDiagnoses", []):
-        diagnosis_name = diagnosis.get("diagnosisName")
-        if not diagnosis_name:
-            continue
-
-        meds = diagnosis.get("treatment", {}).get("medications", [])
-        for med in meds:
-            drug_name = med.get("name")
-            if drug_name:
-                tasks.append({
-                    "drug": drug_name,
-                    "diagnosis": diagnosis_name
-                })
-
-    return tasks
+    return [
+        {"drug": med["name"], "diagnosis": diagnosis["diagnosisName"]}
+        for diagnosis in data.get("currentDiagnoses", [])
+        if diagnosis.get("diagnosisName")
+        for med in diagnosis.get("treatment", {}).get("medications", [])
+        if med.get("name")
+    ]
 
 
 def load_input_with_defaults(filename: str = "input.json") -> dict:
@@ -93,4 +102,116 @@ def load_input_with_defaults(filename: str = "input.json") -> dict:
     if "email" not in data["PubMed"]:
         data["PubMed"]["email"] = "your_email@example.com"
 
-    return data
\ No newline at end of file
+    return data
+
+
+def loads_json_bytes(raw: bytes):
+    """
+    Parse JSON bytes
+    Uses orjson when installed (its errors subclass json.JSONDecodeError)
+    """
+
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def dump_json_bytes(data) -> bytes:
+    """
+    Serialize data as indented UTF-8 JSON
+    Uses orjson when installed, stdlib json otherwise
+    """
+
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2).encode("utf-8")
+
+
+def write_json_file(filename: str, data) -> str:
+    """
+    Write data as indented JSON in a single buffered write
+    """
+
+    payload = dump_json_bytes(data)
+
+    with open(filename, "wb", buffering=1 << 20) as f:
+        f.write(payload)
+
+    return filename
+
+
+def write_handoff_file(basename: str, data) -> str:
+    """
+    Write data for another pipeline stage (not meant for humans)
+    Uses '<basename>.msgpack' when msgpack is installed, '<basename>.json' otherwise,
+    and removes the other format's file so a reader never sees a previous run's data
+    """
+
+    if not MSGPACK_AVAILABLE:
+        filename = write_json_file(f"{basename}.json", data)
+        stale_file = f"{basename}.msgpack"
+    else:
+        filename = f"{basename}.msgpack"
+        with open(filename, "wb", buffering=1 << 20) as f:
+            f.write(msgpack.packb(data, use_bin_type=True))
+        stale_file = f"{basename}.json"
+
+    try:
+        os.remove(stale_file)
+    except FileNotFoundError:
+        pass
+
+    return filename
+
+
+def read_handoff_file(basename: str) -> dict:
+    """
+    Read data written by write_handoff_file
+    """
+
+    msgpack_file = f"{basename}.msgpack"
+    if MSGPACK_AVAILABLE and os.path.exists(msgpack_file):
+        with open(msgpack_file, "rb") as f:
+            return msgpack.unpackb(f.read(), raw=False)
+
+    with open(f"{basename}.json", "rb") as f:
+        return loads_json_bytes(f.read())
+
+
+class FileWriter:
+    """
+    Single background thread that writes queued (filename, bytes) pairs
+    Lets many worker threads hand off their output files without contending
+    on the filesystem; close() (or leaving the with-block) waits for all writes
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="file-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, filename: str, payload: bytes) -> str:
+        self._queue.put((filename, payload))
+        return filename
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            filename, payload = item
+            try:
+                with open(filename, "wb", buffering=1 << 20) as f:
+                    f.write(payload)
+            except OSError as e:
+                log.warning("Could not write %s: %s", filename, e)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
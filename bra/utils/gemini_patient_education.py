@@ -2,36 +2,212 @@
 iBR Report Generator - Gemini API Integration
 Generates patient-context-based monitoring protocols using Gemini AI
 """
-import re
-
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+import asyncio
+import functools
 import json
+import logging
 import os
+import threading
+import time
 from dotenv import load_dotenv
-load_dotenv()
 from google import genai
 from google.genai import types
 
+from utils.disk_cache import DiskCache, cache_key
+
+GEMINI_MODEL = "gemini-2.0-flash"
+
+FALLBACK_MONITORING_PROTOCOL = (
+    "**Monitoring Protocol**\n\n"
+    "Continue standard medication regimen as prescribed. "
+    "Report any unusual symptoms to your healthcare provider."
+)
+
+log = logging.getLogger(__name__)
+
+# .env is read at most once, and only if GEMINI_API_KEY is not already set
+# (server.py loads .env before importing the queue manager)
+_ENV_LOADED = False
+
+# Static part of the prompt; the same for every patient, so it can be held
+# in a Gemini context cache (GEMINI_CONTEXT_CACHE=1) instead of re-sent
+MONITORING_PROMPT_INTRO = "You are a medical AI assistant helping to create a patient-friendly monitoring protocol for medications with life-threatening adverse drug reactions (ADRs)."
+
+MONITORING_PROMPT_INSTRUCTIONS = """**Task:**
+Generate a concise, patient-friendly monitoring protocol in the EXACT format shown below. The protocol should:
+
+1. Be tailored to THIS SPECIFIC PATIENT's medical conditions and risk factors
+2. Categorize symptoms by body system (e.g., Breathing Problems, Urine/Kidney Problems, Heart Problems, Liver Problems, Skin Problems, Stomach/Digestive Problems, etc.)
+3. Use simple, clear language that patients can understand
+4. Add context-specific notes when the patient has relevant existing conditions (e.g., "especially important due to existing kidney condition")
+5. Recommend specific lab tests based on the ADRs and patient's medical history
+6. Organize lab tests into categories (KFTs, LFTs, Blood Tests, Cardiac Markers, etc.)
+
+**REQUIRED FORMAT (follow this EXACTLY):**
+
+**Monitoring Protocol**
+
+Please be aware and monitor for the following signs or symptoms and report immediately to your healthcare provider:
+
+**Breathing Problems** : Trouble breathing, Chest tightness, Loud wheezing sound
+
+**Urine / Kidney Problems** : Passing very little urine, Swelling of feet or face (especially important due to existing kidney condition)
+
+**Heart Problems** : Very fast heartbeat, Feeling faint or dizzy, Swelling of legs
+
+**Liver Problems** : Yellow eyes or yellow skin, Dark colored urine, Severe vomiting, Pain on the right side of stomach
+
+Please do the following lab tests and share reports with your healthcare provider:
+
+● **Kidney Function Tests (KFTs)**
+  ○ Serum creatinine
+  ○ Blood urea
+
+● **Liver Function Tests (LFTs)**
+  ○ AST (SGOT), ALT (SGPT), Bilirubin
+
+**Frequency**
+
+● Every 2 weeks, or as advised by your doctor
+
+**IMPORTANT INSTRUCTIONS:**
+- Only include symptom categories that are RELEVANT to the ADRs listed above
+- Add patient-context notes (in parentheses) ONLY when the patient has a relevant existing condition
+- Select lab tests based on the specific ADRs and patient's medical conditions
+- Use simple, patient-friendly language
+- Keep symptom descriptions concise (3-5 symptoms per category)
+- Organize symptoms from most to least critical
+- DO NOT include any preamble, explanations, or additional text - ONLY the monitoring protocol in the exact format shown"""
+
+# Constant pieces of the prompt around the patient contexts
+_PROMPT_CLOSING = "\n\nGenerate the monitoring protocol now:"
+_PROMPT_PREFIX = MONITORING_PROMPT_INTRO + "\n\n"
+_PROMPT_SUFFIX = "\n\n" + MONITORING_PROMPT_INSTRUCTIONS + _PROMPT_CLOSING
+
+# Explicit context caching is opt-in: Gemini rejects caches smaller than the
+# model's minimum cached token count, and then the full prompt is sent
+CONTEXT_CACHE_ENABLED = os.getenv("GEMINI_CONTEXT_CACHE", "0") == "1"
+CONTEXT_CACHE_TTL = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))  # seconds
+
+# Concurrent Gemini requests in generate_monitoring_protocols_batch, and
+# retries (exponential backoff) for rate-limited or failed async requests
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_MAX_RETRIES = 3
+GEMINI_RETRY_DELAY = 1.0  # seconds, doubled after each attempt
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Rate limits (429) and server errors (5xx) from the GenAI SDK are worth retrying"""
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and (code == 429 or code >= 500)
+
+# Output budget: protocols are typically 500-800 tokens, so requests ask for
+# GEMINI_MAX_OUTPUT_TOKENS and only a truncated answer is redone at the full limit
+GEMINI_MAX_OUTPUT_TOKENS_LIMIT = 2048
+
+
+def _is_truncated(response) -> bool:
+    """True when Gemini stopped because it hit max_output_tokens"""
+    candidates = getattr(response, "candidates", None)
+    return bool(candidates) and candidates[0].finish_reason == types.FinishReason.MAX_TOKENS
+
+# Pseudo-JSON characters stripped from ADR symptom strings
+_SYMPTOM_STRIP = str.maketrans("", "", '{}[]"')
+
+# Generated protocols keyed by a hash of the model and the patient, ADR and
+# RMF contexts, so retries and re-renders of the same report skip Gemini
+PROTOCOL_CACHE_TTL = int(os.getenv("GEMINI_PROTOCOL_CACHE_TTL", "86400"))  # seconds, 0 disables
+_protocol_cache = DiskCache("monitoring_protocols", ttl=PROTOCOL_CACHE_TTL)
+
 class GeminiMonitoringProtocolGenerator:
     """Generates concise monitoring protocols using Gemini API"""
     
+    # Context caches holding the static instructions, shared by all
+    # instances: api_key -> (cache name or None if unavailable, refresh at)
+    _context_caches: Dict[str, tuple] = {}
+    _context_cache_lock = threading.Lock()
+    
     def __init__(self, api_key: str = None):
         """
         Initialize Gemini client
         """
+        global _ENV_LOADED
+        if not _ENV_LOADED and not api_key and not os.getenv("GEMINI_API_KEY"):
+            load_dotenv(override=False)
+            _ENV_LOADED = True
+        
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
+        self.max_output_tokens = int(os.getenv("GEMINI_MAX_OUTPUT_TOKENS", "1024"))
         if not self.api_key:
             raise ValueError("Google API key not provided. Set GEMINI_API_KEY environment variable.")
         
         # Initialize the modern GenAI Client
         self.client = genai.Client(api_key=self.api_key)
     
-    def _call_gemini_api(self, prompt: str) -> str:
+    def _generation_config(self, cached_content: Optional[str] = None,
+                           max_output_tokens: Optional[int] = None) -> types.GenerateContentConfig:
+        """Sampling settings shared by the sync and async API calls"""
+        return types.GenerateContentConfig(
+            temperature=0.3,
+            top_k=40,
+            top_p=0.95,
+            max_output_tokens=max_output_tokens or self.max_output_tokens,
+            cached_content=cached_content,
+        )
+    
+    def _needs_full_budget(self, response) -> bool:
+        """A truncated answer from a reduced output budget is worth one retry at the full limit"""
+        return self.max_output_tokens < GEMINI_MAX_OUTPUT_TOKENS_LIMIT and _is_truncated(response)
+    
+    def _get_cached_content(self) -> Optional[str]:
+        """
+        Name of the context cache holding the static prompt instructions,
+        created (or re-created before it expires) on demand
+        
+        Returns:
+            Cache name, or None when caching is disabled or unavailable
+        """
+        if not CONTEXT_CACHE_ENABLED:
+            return None
+        
+        with self._context_cache_lock:
+            entry = self._context_caches.get(self.api_key)
+            if entry is not None and (entry[0] is None or entry[1] > time.monotonic()):
+                return entry[0]
+            
+            try:
+                cache = self.client.caches.create(
+                    model=GEMINI_MODEL,
+                    config=types.CreateCachedContentConfig(
+                        system_instruction=f"{MONITORING_PROMPT_INTRO}\n\n{MONITORING_PROMPT_INSTRUCTIONS}",
+                        ttl=f"{CONTEXT_CACHE_TTL}s",
+                    )
+                )
+                name = cache.name
+            except Exception as e:
+                # Not retried: e.g. the instructions are below the model's minimum cache size
+                log.warning("Gemini context cache unavailable (%s), sending full prompts", e)
+                name = None
+            
+            # Refresh a minute before the server drops it
+            self._context_caches[self.api_key] = (name, time.monotonic() + CONTEXT_CACHE_TTL - 60)
+            return name
+    
+    def _drop_cached_content(self, cached_content: str):
+        """Forget a context cache that failed, so the next call re-creates it"""
+        with self._context_cache_lock:
+            entry = self._context_caches.get(self.api_key)
+            if entry is not None and entry[0] == cached_content:
+                del self._context_caches[self.api_key]
+    
+    def _call_gemini_api(self, prompt: str, cached_content: Optional[str] = None) -> str:
         """
         Call Gemini API to generate content using the Google GenAI SDK
         
         Args:
             prompt: The prompt to send to Gemini
+            cached_content: Context cache to prepend (optional)
             
         Returns:
             Generated text response
@@ -40,15 +216,16 @@ class GeminiMonitoringProtocolGenerator:
             # Use the SDK client initialized in __init__
             # Model can be "gemini-2.0-flash" or "gemini-1.5-flash"
             response = self.client.models.generate_content(
-                model="gemini-2.0-flash",
+                model=GEMINI_MODEL,
                 contents=prompt,
-                config=types.GenerateContentConfig(
-                    temperature=0.3,
-                    top_k=40,
-                    top_p=0.95,
-                    max_output_tokens=2048,
-                )
+                config=self._generation_config(cached_content)
             )
+            if self._needs_full_budget(response):
+                response = self.client.models.generate_content(
+                    model=GEMINI_MODEL,
+                    contents=prompt,
+                    config=self._generation_config(cached_content, GEMINI_MAX_OUTPUT_TOKENS_LIMIT)
+                )
 
             # The new SDK returns response.text directly if successful
             if response and response.text:
@@ -62,6 +239,51 @@ class GeminiMonitoringProtocolGenerator:
             # Catching generic exceptions from the SDK (e.g., Auth, Quota, or Network)
             return f"Error calling Gemini API: {str(e)}"
     
+    async def _call_gemini_api_async(self, prompt: str, cached_content: Optional[str] = None) -> str:
+        """
+        Async variant of _call_gemini_api (client.aio), so many reports can
+        await Gemini concurrently instead of blocking a thread each
+        Rate-limited (429) and 5xx requests are retried with backoff
+        """
+        for attempt in range(GEMINI_MAX_RETRIES + 1):
+            try:
+                response = await self.client.aio.models.generate_content(
+                    model=GEMINI_MODEL,
+                    contents=prompt,
+                    config=self._generation_config(cached_content)
+                )
+                if self._needs_full_budget(response):
+                    response = await self.client.aio.models.generate_content(
+                        model=GEMINI_MODEL,
+                        contents=prompt,
+                        config=self._generation_config(cached_content, GEMINI_MAX_OUTPUT_TOKENS_LIMIT)
+                    )
+            except Exception as e:
+                if attempt < GEMINI_MAX_RETRIES and _is_retryable(e):
+                    await asyncio.sleep(GEMINI_RETRY_DELAY * 2 ** attempt)
+                    continue
+                return f"Error calling Gemini API: {str(e)}"
+
+            if response and response.text:
+                return response.text
+            
+            return "Error: Gemini API returned an empty response."
+    
+    def _call_gemini_api_stream(self, prompt: str, cached_content: Optional[str] = None) -> Iterator[str]:
+        """
+        Streaming variant of _call_gemini_api: yields text chunks as Gemini
+        generates them (SDK errors propagate to the caller)
+        Uses the full output limit, since a streamed answer cannot be redone
+        """
+        stream = self.client.models.generate_content_stream(
+            model=GEMINI_MODEL,
+            contents=prompt,
+            config=self._generation_config(cached_content, GEMINI_MAX_OUTPUT_TOKENS_LIMIT)
+        )
+        for chunk in stream:
+            if chunk.text:
+                yield chunk.text
+    
     def _prepare_patient_context(self, patient_info: Dict) -> str:
         """
         Prepare patient context for RAG
@@ -72,15 +294,16 @@ class GeminiMonitoringProtocolGenerator:
         Returns:
             Formatted patient context string
         """
-        context = "**Patient Information:**\n\n"
-        
         # Basic demographics
-        context += f"- Age: {patient_info.get('age', 'Unknown')} years\n"
-        context += f"- Gender: {patient_info.get('gender', 'Unknown')}\n"
+        parts = [
+            "**Patient Information:**\n\n",
+            f"- Age: {patient_info.get('age', 'Unknown')} years\n",
+            f"- Gender: {patient_info.get('gender', 'Unknown')}\n",
+        ]
         
         # Current diagnosis
         if patient_info.get('diagnosis'):
-            context += f"- Current Diagnosis: {patient_info['diagnosis']}\n"
+            parts.append(f"- Current Diagnosis: {patient_info['diagnosis']}\n")
         
         # Chief complaints
         chief_complaints = patient_info.get('chiefComplaints', [])
@@ -88,30 +311,31 @@ class GeminiMonitoringProtocolGenerator:
             complaints_list = [f"{c.get('complaint', '')} ({c.get('severity', '')}, {c.get('duration', '')})" 
                              for c in chief_complaints if c.get('complaint')]
             if complaints_list:
-                context += f"- Chief Complaints: {', '.join(complaints_list)}\n"
+                parts.append("- Chief Complaints: " + ", ".join(complaints_list) + "\n")
         
         # Current diagnoses
         current_diagnoses = patient_info.get('currentDiagnoses', [])
         if current_diagnoses:
-            context += "\n**Current Active Conditions:**\n"
-            for dx in current_diagnoses:
-                context += f"- {dx.get('diagnosisName', 'Unknown')} (Status: {dx.get('status', 'Unknown')}, Severity: {dx.get('severity', 'Unknown')})\n"
+            parts.append("\n**Current Active Conditions:**\n")
+            parts.extend(
+                f"- {dx.get('diagnosisName', 'Unknown')} (Status: {dx.get('status', 'Unknown')}, Severity: {dx.get('severity', 'Unknown')})\n"
+                for dx in current_diagnoses
+            )
         
         # Medical history
         medical_history = patient_info.get('MedicalHistory', [])
         if medical_history:
-            context += "\n**Medical History:**\n"
+            parts.append("\n**Medical History:**\n")
             for history_item in medical_history:
                 diagnosis = history_item.get('diagnosisName', 'Unknown')
                 date = history_item.get('diagnosisDate', 'Unknown date')
                 status = history_item.get('status', 'Unknown status')
-                context += f"- {diagnosis} (Since: {date}, Status: {status})\n"
+                parts.append(f"- {diagnosis} (Since: {date}, Status: {status})\n")
         
         # Social risk factors
         if patient_info.get('social_risk_factors'):
-            context += f"\n**Social Risk Factors:** {patient_info['social_risk_factors']}\n"
-        print(f'patient context if {context}')
-        return context
+            parts.append(f"\n**Social Risk Factors:** {patient_info['social_risk_factors']}\n")
+        return "".join(parts)
 
     def _prepare_adr_context(self, lt_adrs_list: list) -> str:
         """
@@ -124,10 +348,9 @@ class GeminiMonitoringProtocolGenerator:
             Formatted ADR context string
         """
         if not lt_adrs_list:
-            print("online 142")
             return "No specific life-threatening ADRs identified for monitoring."
 
-        context = "**Life-Threatening Adverse Drug Reactions (ADRs) to Monitor:**\n\n"
+        parts = ["**Life-Threatening Adverse Drug Reactions (ADRs) to Monitor:**\n\n"]
         
         for adr_entry in lt_adrs_list:
             # 1. Extract data using keys found in your 'risk_mitigation_measures'
@@ -143,24 +366,26 @@ class GeminiMonitoringProtocolGenerator:
             clean_symptoms = self._clean_symptom_string(raw_symptoms)
 
             # 3. Build the context block
-            context += f"### Medication: {medication}\n"
-            context += f"- **Potential Risk:** {risk_name}\n"
-            context += f"- **Symptoms to Watch For:** {clean_symptoms}\n"
-            context += f"- **Required Action:** {immediate_action}\n"
+            parts.append(
+                f"### Medication: {medication}\n"
+                f"- **Potential Risk:** {risk_name}\n"
+                f"- **Symptoms to Watch For:** {clean_symptoms}\n"
+                f"- **Required Action:** {immediate_action}\n"
+            )
             if reasoning:
-                context += f"- **Clinical Urgency:** {reasoning}\n"
-            context += "\n---\n"
-        print(f"the adr context is {context}")
+                parts.append(f"- **Clinical Urgency:** {reasoning}\n")
+            parts.append("\n---\n")
+        context = "".join(parts)
+        log.debug("ADR context: %s", context)
         return context
 
     def _clean_symptom_string(self, symptom_str: str) -> str:
         """Helper to strip malformed JSON characters from symptom strings."""
         if not symptom_str or symptom_str == 'NA':
-            print("return from 174")
             return "Not specified"
         
         # Remove curly braces, brackets, quotes, and the "symptoms" key name
-        cleaned = re.sub(r'[\{\}\[\]\"]', '', symptom_str)
+        cleaned = symptom_str.translate(_SYMPTOM_STRIP)
         cleaned = cleaned.replace(', symptoms:', '').replace('symptoms:', '')
         
         # Remove leading commas or whitespace left over
@@ -179,129 +404,82 @@ class GeminiMonitoringProtocolGenerator:
             Formatted RMF context string
         """
         if not rmf_data:
-            print('returnig from197')
             return ""
         
-        context = "**Risk Mitigation Information:**\n\n"
+        parts = ["**Risk Mitigation Information:**\n\n"]
         
         # Reversibility data
         reversibility_data = rmf_data.get('risk_reversibility_risk_tolerability', {})
         if reversibility_data:
-            context += "**Reversibility Assessment:**\n"
+            parts.append("**Reversibility Assessment:**\n")
             for key, value in reversibility_data.items():
                 adr_name = key.split(' - ')[1] if ' - ' in key else key
                 classification = value.get('classification', 'Unknown')
                 reasoning = value.get('reasoning', '')
                 
-                context += f"- {adr_name}: {classification}\n"
+                parts.append(f"- {adr_name}: {classification}\n")
                 if reasoning:
-                    context += f"  Reasoning: {reasoning[:200]}...\n" if len(reasoning) > 200 else f"  Reasoning: {reasoning}\n"
+                    parts.append(f"  Reasoning: {reasoning[:200]}{'...' if len(reasoning) > 200 else ''}\n")
         
         # Preventability data
         preventability_data = rmf_data.get('risk_preventability', {})
         if preventability_data:
-            context += "\n**Preventability Assessment:**\n"
+            parts.append("\n**Preventability Assessment:**\n")
             for key, value in preventability_data.items():
                 adr_name = key.split(' - ')[1] if ' - ' in key else key
                 classification = value.get('classification', 'Unknown')
                 prevention_measures = value.get('prevention_measures', [])
                 
-                context += f"- {adr_name}: {classification}\n"
+                parts.append(f"- {adr_name}: {classification}\n")
                 if prevention_measures:
-                    context += f"  Prevention: {', '.join(prevention_measures[:3])}\n"
+                    parts.append(f"  Prevention: {', '.join(prevention_measures[:3])}\n")
         # print(f'the ')
-        return context
+        return "".join(parts)
     
-    def generate_monitoring_protocol(self, analysis_results: Dict, patient_info: Dict) -> str:
+    def _build_contexts(self, analysis_results: Dict, patient_info: Dict) -> Optional[tuple]:
         """
-        Generate patient-friendly monitoring protocol using Gemini API
+        Build the patient-specific parts of the prompt
         
-        Args:
-            analysis_results: Complete analysis results with LT ADRs
-            patient_info: Patient demographic and medical information
-            
         Returns:
-            Formatted monitoring protocol string
+            (patient, ADR, RMF) context strings, or None when there are no
+            LT ADRs to monitor
         """
         # Extract LT ADRs data
         # print(f'analysis result are{analysis_results}')
         lt_adrs_list = analysis_results.get("risk_mitigation_measures", [])        
-        print(f'the lt_adrs are {lt_adrs_list}')
+        log.debug("LT ADRs: %s", lt_adrs_list)
         if not lt_adrs_list:
-         print("returning from there")
-         return ("**Monitoring Protocol**\n\n"
-               "Continue standard medication regimen as prescribed. "
-               "Report any unusual symptoms to your healthcare provider.")
+            return None
         
         # Extract RMF data if available
 
         rmf_data = analysis_results.get("factor_3_4_risk_mitigation_feasibility", {})
-        print(f'rmf data is {rmf_data}')
+        log.debug("RMF data: %s", rmf_data)
         # Prepare context for RAG
         patient_context = self._prepare_patient_context(patient_info)
         adr_context = self._prepare_adr_context(lt_adrs_list)
         rmf_context = self._prepare_rmf_context(rmf_data)
+        return patient_context, adr_context, rmf_context
+    
+    def _build_prompt(self, contexts: tuple, cached: bool = False) -> str:
+        """
+        Build the Gemini prompt from the patient contexts
+        With cached=True the static intro and instructions are left out
+        (they are sent from the context cache)
+        """
+        patient_context, adr_context, rmf_context = contexts
         
-        # Create prompt for Gemini
-        prompt = f"""You are a medical AI assistant helping to create a patient-friendly monitoring protocol for medications with life-threatening adverse drug reactions (ADRs).
-
-{patient_context}
-
-{adr_context}
-
-{rmf_context}
-
-**Task:**
-Generate a concise, patient-friendly monitoring protocol in the EXACT format shown below. The protocol should:
-
-1. Be tailored to THIS SPECIFIC PATIENT's medical conditions and risk factors
-2. Categorize symptoms by body system (e.g., Breathing Problems, Urine/Kidney Problems, Heart Problems, Liver Problems, Skin Problems, Stomach/Digestive Problems, etc.)
-3. Use simple, clear language that patients can understand
-4. Add context-specific notes when the patient has relevant existing conditions (e.g., "especially important due to existing kidney condition")
-5. Recommend specific lab tests based on the ADRs and patient's medical history
-6. Organize lab tests into categories (KFTs, LFTs, Blood Tests, Cardiac Markers, etc.)
-
-**REQUIRED FORMAT (follow this EXACTLY):**
-
-**Monitoring Protocol**
-
-Please be aware and monitor for the following signs or symptoms and report immediately to your healthcare provider:
-
-**Breathing Problems** : Trouble breathing, Chest tightness, Loud wheezing sound
-
-**Urine / Kidney Problems** : Passing very little urine, Swelling of feet or face (especially important due to existing kidney condition)
-
-**Heart Problems** : Very fast heartbeat, Feeling faint or dizzy, Swelling of legs
-
-**Liver Problems** : Yellow eyes or yellow skin, Dark colored urine, Severe vomiting, Pain on the right side of stomach
-
-Please do the following lab tests and share reports with your healthcare provider:
-
-● **Kidney Function Tests (KFTs)**
-  ○ Serum creatinine
-  ○ Blood urea
-
-● **Liver Function Tests (LFTs)**
-  ○ AST (SGOT), ALT (SGPT), Bilirubin
-
-**Frequency**
-
-● Every 2 weeks, or as advised by your doctor
-
-**IMPORTANT INSTRUCTIONS:**
-- Only include symptom categories that are RELEVANT to the ADRs listed above
-- Add patient-context notes (in parentheses) ONLY when the patient has a relevant existing condition
-- Select lab tests based on the specific ADRs and patient's medical conditions
-- Use simple, patient-friendly language
-- Keep symptom descriptions concise (3-5 symptoms per category)
-- Organize symptoms from most to least critical
-- DO NOT include any preamble, explanations, or additional text - ONLY the monitoring protocol in the exact format shown
-
-Generate the monitoring protocol now:"""
-
-        # Call Gemini API
-        response = self._call_gemini_api(prompt)
+        if cached:
+            return "".join((patient_context, "\n\n", adr_context, "\n\n", rmf_context, _PROMPT_CLOSING))
         
+        # Create prompt for Gemini
+        return "".join((
+            _PROMPT_PREFIX, patient_context, "\n\n", adr_context, "\n\n", rmf_context, _PROMPT_SUFFIX
+        ))
+    
+    @staticmethod
+    def _clean_response(response: str) -> str:
+        """Strip whitespace and markdown code fences from a Gemini response"""
         # Clean up response (remove any markdown code blocks if present)
         response = response.strip()
         if response.startswith("```"):
@@ -311,6 +489,141 @@ Generate the monitoring protocol now:"""
             response = response.strip()
         
         return response
+    
+    def _remember_protocol(self, key: str, response: str) -> str:
+        """Clean a Gemini response and cache it (error messages are not cached)"""
+        protocol = self._clean_response(response)
+        if not response.startswith("Error"):
+            _protocol_cache.set(key, protocol)
+        return protocol
+    
+    def generate_monitoring_protocol(self, analysis_results: Dict, patient_info: Dict) -> str:
+        """
+        Generate patient-friendly monitoring protocol using Gemini API
+        
+        Args:
+            analysis_results: Complete analysis results with LT ADRs
+            patient_info: Patient demographic and medical information
+            
+        Returns:
+            Formatted monitoring protocol string
+        """
+        contexts = self._build_contexts(analysis_results, patient_info)
+        if contexts is None:
+            return FALLBACK_MONITORING_PROTOCOL
+        
+        key = cache_key("monitoring_protocol", GEMINI_MODEL, *contexts)
+        cached = _protocol_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        # Call Gemini API
+        cached_content = self._get_cached_content()
+        response = self._call_gemini_api(self._build_prompt(contexts, cached=bool(cached_content)), cached_content)
+        if cached_content and response.startswith("Error"):
+            # The cache may have expired server-side; retry once without it
+            self._drop_cached_content(cached_content)
+            response = self._call_gemini_api(self._build_prompt(contexts))
+        
+        return self._remember_protocol(key, response)
+    
+    async def generate_monitoring_protocol_async(self, analysis_results: Dict, patient_info: Dict) -> str:
+        """
+        Async variant of generate_monitoring_protocol; callers can
+        asyncio.gather() it over many patients
+        """
+        contexts = self._build_contexts(analysis_results, patient_info)
+        if contexts is None:
+            return FALLBACK_MONITORING_PROTOCOL
+        
+        key = cache_key("monitoring_protocol", GEMINI_MODEL, *contexts)
+        cached = _protocol_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        cached_content = self._get_cached_content()
+        response = await self._call_gemini_api_async(self._build_prompt(contexts, cached=bool(cached_content)), cached_content)
+        if cached_content and response.startswith("Error"):
+            self._drop_cached_content(cached_content)
+            response = await self._call_gemini_api_async(self._build_prompt(contexts))
+        
+        return self._remember_protocol(key, response)
+    
+    def generate_monitoring_protocol_stream(self, analysis_results: Dict, patient_info: Dict) -> Iterator[str]:
+        """
+        Generate the monitoring protocol incrementally, one line at a time as
+        Gemini produces it, for callers that render it while it is generated
+        
+        Args:
+            analysis_results: Complete analysis results with LT ADRs
+            patient_info: Patient demographic and medical information
+            
+        Yields:
+            Protocol text fragments (markdown code fence lines are dropped)
+        """
+        contexts = self._build_contexts(analysis_results, patient_info)
+        if contexts is None:
+            yield FALLBACK_MONITORING_PROTOCOL
+            return
+        
+        key = cache_key("monitoring_protocol", GEMINI_MODEL, *contexts)
+        cached = _protocol_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        cached_content = self._get_cached_content()
+        prompt = self._build_prompt(contexts, cached=bool(cached_content))
+        chunks = []
+        pending = ""
+        try:
+            for text in self._call_gemini_api_stream(prompt, cached_content):
+                chunks.append(text)
+                *lines, pending = (pending + text).split("\n")
+                for line in lines:
+                    if not line.strip().startswith("```"):
+                        yield line + "\n"
+        except Exception as e:
+            # Part of the protocol may already be out, so there is no retry
+            if cached_content:
+                self._drop_cached_content(cached_content)
+            yield f"Error calling Gemini API: {str(e)}"
+            return
+        
+        if pending and not pending.strip().startswith("```"):
+            yield pending
+        
+        if chunks:
+            self._remember_protocol(key, "".join(chunks))
+    
+    async def generate_monitoring_protocols_batch(self, items: List[Tuple[Dict, Dict]],
+                                                  max_concurrency: int = GEMINI_MAX_CONCURRENCY) -> List:
+        """
+        Generate protocols for a cohort, at most max_concurrency Gemini requests at a time
+        
+        Args:
+            items: (analysis_results, patient_info) pairs
+            max_concurrency: Concurrent request limit (GEMINI_MAX_CONCURRENCY)
+            
+        Returns:
+            Protocol strings in input order (an exception in place of a failed one)
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def generate_one(analysis_results: Dict, patient_info: Dict) -> str:
+            async with semaphore:
+                return await self.generate_monitoring_protocol_async(analysis_results, patient_info)
+        
+        return await asyncio.gather(*(generate_one(*item) for item in items), return_exceptions=True)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_generator(api_key: Optional[str] = None) -> GeminiMonitoringProtocolGenerator:
+    """
+    Shared generator per API key, so its GenAI client (and HTTP connection
+    pool) is reused across reports; the sync client is safe to share between threads
+    """
+    return GeminiMonitoringProtocolGenerator(api_key=api_key)
 
 
 def integrate_with_ibr_generator(IBRReportGenerator):
@@ -348,18 +661,38 @@ def integrate_with_ibr_generator(IBRReportGenerator):
         if use_gemini:
             try:
                 # Use Gemini API
-                gemini_generator = GeminiMonitoringProtocolGenerator(api_key=gemini_api_key)
-                return gemini_generator.generate_monitoring_protocol(analysis_results, patient_info)
+                return _get_generator(gemini_api_key).generate_monitoring_protocol(analysis_results, patient_info)
             except Exception as e:
-                print(f"Warning: Gemini API failed ({str(e)}), falling back to default method")
+                log.warning("Gemini API failed (%s), falling back to default method", e)
                 # Fall back to original method if Gemini fails
                 return original_generate_monitoring_protocol(analysis_results, patient_info, conditional_meds)
         else:
             # Use original method
             return original_generate_monitoring_protocol(analysis_results, patient_info, conditional_meds)
     
+    @classmethod
+    async def generate_monitoring_protocol_with_gemini_async(cls, analysis_results: Dict, patient_info: Dict,
+                                                             conditional_meds: List = None,
+                                                             use_gemini: bool = True,
+                                                             gemini_api_key: str = None) -> str:
+        """
+        Async variant of generate_monitoring_protocol_with_gemini
+        (the fallback method is sync and runs inline)
+        """
+        if use_gemini:
+            try:
+                return await _get_generator(gemini_api_key).generate_monitoring_protocol_async(
+                    analysis_results, patient_info
+                )
+            except Exception as e:
+                log.warning("Gemini API failed (%s), falling back to default method", e)
+                return original_generate_monitoring_protocol(analysis_results, patient_info, conditional_meds)
+        else:
+            return original_generate_monitoring_protocol(analysis_results, patient_info, conditional_meds)
+    
     # Replace method
     IBRReportGenerator.generate_monitoring_protocol = generate_monitoring_protocol_with_gemini
+    IBRReportGenerator.generate_monitoring_protocol_async = generate_monitoring_protocol_with_gemini_async
     
     return IBRReportGenerator
 
@@ -378,9 +711,16 @@ def generate_gemini_monitoring_protocol(analysis_results: Dict, patient_info: Di
     Returns:
         Formatted monitoring protocol string
     """
-    print("inside the generate_gemini_monitornig_protocol")
-    generator = GeminiMonitoringProtocolGenerator(api_key=gemini_api_key)
-    return generator.generate_monitoring_protocol(analysis_results, patient_info)
+    return _get_generator(gemini_api_key).generate_monitoring_protocol(analysis_results, patient_info)
+
+
+async def agenerate_gemini_monitoring_protocol(analysis_results: Dict, patient_info: Dict,
+                                               gemini_api_key: str = None) -> str:
+    """
+    Async variant of generate_gemini_monitoring_protocol, for awaiting
+    several patients' protocols together with asyncio.gather()
+    """
+    return await _get_generator(gemini_api_key).generate_monitoring_protocol_async(analysis_results, patient_info)
 
 
 if __name__ == "__main__":
@@ -15,6 +15,8 @@ from datetime import datetime
 from typing import Dict, Optional, List
 from pathlib import Path
 
+from utils.file_loader import write_json_file
+
 
 def collect_results_with_ibr_scoring(results_dir: str, workspace_dir: str, input_data: Dict) -> Dict:
     """
@@ -39,6 +41,9 @@ def collect_results_with_ibr_scoring(results_dir: str, workspace_dir: str, input
     if not os.path.exists(results_dir):
         return None
     
+    # Alternative result files are parsed once and shared by every primary drug
+    alternatives_by_condition = load_alternative_results(results_dir)
+    
     # Collect primary results
     for filename in sorted(os.listdir(results_dir)):
         if filename.startswith("ALT_") or filename.startswith("analysis_summary_"):
@@ -105,7 +110,9 @@ def collect_results_with_ibr_scoring(results_dir: str, workspace_dir: str, input
                     rmf_score = ScoringConfig.calculate_mitigation_feasibility_score(rmf_data)
                 
                 # Collect alternatives
-                alt_results = collect_alternatives_for_drug(results_dir, medicine_name, condition)
+                alt_results = collect_alternatives_for_drug(
+                    results_dir, medicine_name, condition, alternatives_by_condition
+                )
                 
                 # Build comprehensive primary result
                 primary_result = {
@@ -181,9 +188,9 @@ def collect_results_with_ibr_scoring(results_dir: str, workspace_dir: str, input
     return formatted_response
 
 
-def collect_alternatives_for_drug(results_dir: str, drug_name: str, condition: str) -> List[Dict]:
-    """Collect all alternative analyses for a specific primary drug"""
-    alt_results = []
+def load_alternative_results(results_dir: str) -> Dict[str, List[tuple]]:
+    """Read every ALT_* result file once, grouped by lowercased condition"""
+    alternatives_by_condition = {}
     
     for alt_file in sorted(os.listdir(results_dir)):
         if not alt_file.startswith("ALT_") or not alt_file.endswith("_result.json"):
@@ -203,34 +210,53 @@ def collect_alternatives_for_drug(results_dir: str, drug_name: str, condition: s
             alt_drug_name = alt_parts[0] if alt_parts else "Unknown"
             alt_condition = "_".join(alt_parts[1:]).replace("_", " ") if len(alt_parts) > 1 else ""
             
-            if alt_condition.lower() == condition.lower():
-                alt_results.append({
-                    "success": True,
-                    "drug": alt_drug_name,
-                    "diagnosis": condition,
-                    "total_benefit_score": alt_brr.get("total_benefit_score", 0),
-                    "total_risk_score": alt_brr.get("total_risk_score", 0),
-                    "brr": alt_brr.get("brr"),
-                    "brr_interpretation": alt_brr.get("interpretation"),
-                    "rct_count": alt_summary.get("rct_count", 0),
-                    "has_contraindication": alt_summary.get("has_contraindication", False),
-                    "has_life_threatening_adrs": alt_summary.get("has_life_threatening_adrs", False),
-                    "has_serious_adrs": alt_summary.get("has_serious_adrs", False),
-                    "has_drug_interactions": alt_summary.get("has_drug_interactions", False),
-                    "alternative_info": {
-                        "brand_name": alt_drug_name,
-                        "generic_name": alt_drug_name,
-                        "alternative_rank": len(alt_results) + 1,
-                        "primary_drug": drug_name,
-                        "primary_diagnosis": condition
-                    },
-                    "output_file": alt_path
-                })
+            alternatives_by_condition.setdefault(alt_condition.lower(), []).append(
+                (alt_drug_name, alt_path, alt_summary, alt_brr)
+            )
         
         except Exception as e:
             print(f"Error reading alternative {alt_file}: {e}")
             continue
     
+    return alternatives_by_condition
+
+
+def collect_alternatives_for_drug(
+    results_dir: str,
+    drug_name: str,
+    condition: str,
+    alternatives_by_condition: Optional[Dict[str, List[tuple]]] = None
+) -> List[Dict]:
+    """Collect all alternative analyses for a specific primary drug"""
+    if alternatives_by_condition is None:
+        alternatives_by_condition = load_alternative_results(results_dir)
+    
+    alt_results = []
+    
+    for alt_drug_name, alt_path, alt_summary, alt_brr in alternatives_by_condition.get(condition.lower(), []):
+        alt_results.append({
+            "success": True,
+            "drug": alt_drug_name,
+            "diagnosis": condition,
+            "total_benefit_score": alt_brr.get("total_benefit_score", 0),
+            "total_risk_score": alt_brr.get("total_risk_score", 0),
+            "brr": alt_brr.get("brr"),
+            "brr_interpretation": alt_brr.get("interpretation"),
+            "rct_count": alt_summary.get("rct_count", 0),
+            "has_contraindication": alt_summary.get("has_contraindication", False),
+            "has_life_threatening_adrs": alt_summary.get("has_life_threatening_adrs", False),
+            "has_serious_adrs": alt_summary.get("has_serious_adrs", False),
+            "has_drug_interactions": alt_summary.get("has_drug_interactions", False),
+            "alternative_info": {
+                "brand_name": alt_drug_name,
+                "generic_name": alt_drug_name,
+                "alternative_rank": len(alt_results) + 1,
+                "primary_drug": drug_name,
+                "primary_diagnosis": condition
+            },
+            "output_file": alt_path
+        })
+    
     return alt_results
 
 
@@ -464,8 +490,7 @@ class JobQueue:
             os.makedirs(job_workspace, exist_ok=True)
             os.makedirs(results_dir, exist_ok=True)
             
-            with open(input_file, "w", encoding="utf-8") as f:
-                json.dump(job.request_data, f, indent=2)
+            write_json_file(input_file, job.request_data)
             
             from main import main as run_analysis
             
@@ -473,10 +498,12 @@ class JobQueue:
             os.chdir(job_workspace)
             
             start_time = time.perf_counter()
+            # The request is already parsed; input.json is kept as a record only
             success = run_analysis(
                 verbose=False,
                 input_file="input.json",
-                output_summary=True
+                output_summary=True,
+                input_data=job.request_data
             )
             end_time = time.perf_counter()
             execution_time = end_time - start_time
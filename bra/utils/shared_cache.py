@@ -0,0 +1,60 @@
+
+# ================================
+# utils/shared_cache.py
+# ================================
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class SharedResultCache:
+    """
+    Thread-safe in-process memo (LRU + TTL)
+    Concurrent callers asking for the same key share one in-flight call
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, Future)
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, calling compute() at most once per key"""
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                future, owner = entry[1], False
+            else:
+                future, owner = Future(), True
+                expires_at = now + self.ttl if self.ttl is not None else float("inf")
+                self._entries[key] = (expires_at, future)
+                self._entries.move_to_end(key)
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            # Failures are not cached; the next caller retries
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] is future:
+                    del self._entries[key]
+            future.set_exception(e)
+            raise
+
+        future.set_result(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import time
+from utils.disk_cache import DiskCache, cache_key
+
+
+def test_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = DiskCache("test", ttl=60, path=os.path.join(tmp, "test.sqlite"))
+        value = {"result": {"brr": 1.5, "drug": "metformin"}, "payload": "{}"}
+        cache.set("k", value)
+        assert cache.get("k") == value
+        assert cache.get("missing") is None
+
+        # A second instance (another process or run) sees the same entry
+        reopened = DiskCache("test", ttl=60, path=os.path.join(tmp, "test.sqlite"))
+        assert reopened.get("k") == value
+
+
+def test_expiry():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = DiskCache("test", ttl=0.05, path=os.path.join(tmp, "test.sqlite"))
+        cache.set("k", [1, 2, 3])
+        assert cache.get("k") == [1, 2, 3]
+        time.sleep(0.1)
+        assert cache.get("k") is None
+
+
+def test_disabled_with_zero_ttl():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "test.sqlite")
+        cache = DiskCache("test", ttl=0, path=path)
+        cache.set("k", 1)
+        assert cache.get("k") is None
+        assert not os.path.exists(path)
+
+
+def test_cache_key():
+    assert cache_key("drug", {"a": 1, "b": 2}) == cache_key("drug", {"b": 2, "a": 1})
+    assert cache_key("drug", {"a": 1}) != cache_key("drug", {"a": 2})
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_expiry()
+    test_disabled_with_zero_ttl()
+    test_cache_key()
+    print("disk cache OK")
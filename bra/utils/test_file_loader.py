@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+from utils import file_loader
+from utils.file_loader import FileWriter, dump_json_bytes, read_handoff_file, write_handoff_file
+
+PATIENT = {
+    "patient": {"name": "Test Patient", "age": 64, "weight_kg": 81.5},
+    "medications": [{"name": "metformin", "dose": "500 mg"}, {"name": "lisinopril", "dose": None}],
+    "flags": [True, False],
+}
+
+
+def test_handoff_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        basename = os.path.join(tmp, "handoff")
+        write_handoff_file(basename, PATIENT)
+        assert read_handoff_file(basename) == PATIENT
+
+
+def test_handoff_json_fallback():
+    available = file_loader.MSGPACK_AVAILABLE
+    file_loader.MSGPACK_AVAILABLE = False
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            basename = os.path.join(tmp, "handoff")
+            filename = write_handoff_file(basename, PATIENT)
+            assert filename == f"{basename}.json"
+            # The fallback file is plain JSON, as the old handoff wrote it
+            with open(filename) as f:
+                assert json.load(f) == PATIENT
+            assert read_handoff_file(basename) == PATIENT
+    finally:
+        file_loader.MSGPACK_AVAILABLE = available
+
+
+def test_handoff_replaces_other_format():
+    available = file_loader.MSGPACK_AVAILABLE
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            basename = os.path.join(tmp, "handoff")
+            # A file left by an earlier run in the other format must not be read
+            stale_file = f"{basename}.json" if available else f"{basename}.msgpack"
+            with open(stale_file, "wb") as f:
+                f.write(b"stale")
+            write_handoff_file(basename, PATIENT)
+            assert not os.path.exists(stale_file)
+            assert read_handoff_file(basename) == PATIENT
+
+            # Writing JSON after msgpack became unavailable
+            file_loader.MSGPACK_AVAILABLE = False
+            write_handoff_file(basename, {"run": 2})
+            file_loader.MSGPACK_AVAILABLE = available
+            assert read_handoff_file(basename) == {"run": 2}
+    finally:
+        file_loader.MSGPACK_AVAILABLE = available
+
+
+def test_dump_json_bytes_matches_json():
+    assert json.loads(dump_json_bytes(PATIENT)) == PATIENT
+
+
+def test_file_writer():
+    with tempfile.TemporaryDirectory() as tmp:
+        names = [os.path.join(tmp, f"out_{i}.json") for i in range(5)]
+        with FileWriter() as writer:
+            for i, name in enumerate(names):
+                writer.put(name, dump_json_bytes({"i": i}))
+
+        for i, name in enumerate(names):
+            with open(name) as f:
+                assert json.load(f) == {"i": i}
+
+
+if __name__ == "__main__":
+    test_handoff_round_trip()
+    test_handoff_json_fallback()
+    test_handoff_replaces_other_format()
+    test_dump_json_bytes_matches_json()
+    test_file_writer()
+    print("file loader OK")
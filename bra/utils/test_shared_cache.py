@@ -0,0 +1,71 @@
+import threading
+import time
+from utils.shared_cache import SharedResultCache
+
+
+def test_lru_eviction():
+    cache = SharedResultCache(maxsize=2)
+    cache.get_or_compute("a", lambda: 1)
+    cache.get_or_compute("b", lambda: 2)
+    cache.get_or_compute("a", lambda: "recomputed")  # "a" is now most recent
+    cache.get_or_compute("c", lambda: 3)             # evicts "b"
+
+    assert cache.get_or_compute("a", lambda: "recomputed") == 1
+    assert cache.get_or_compute("b", lambda: "recomputed") == "recomputed"
+
+
+def test_ttl_expiry():
+    cache = SharedResultCache(ttl=0.05)
+    assert cache.get_or_compute("k", lambda: 1) == 1
+    assert cache.get_or_compute("k", lambda: 2) == 1
+    time.sleep(0.1)
+    assert cache.get_or_compute("k", lambda: 3) == 3
+
+
+def test_shared_in_flight():
+    cache = SharedResultCache()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == ["value"] * 8
+
+
+def test_failure_not_cached():
+    cache = SharedResultCache()
+
+    def fail():
+        raise ValueError("boom")
+
+    try:
+        cache.get_or_compute("k", fail)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+    assert cache.get_or_compute("k", lambda: "retried") == "retried"
+
+
+if __name__ == "__main__":
+    test_lru_eviction()
+    test_ttl_expiry()
+    test_shared_in_flight()
+    test_failure_not_cached()
+    print("shared cache OK")